@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -44,13 +45,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings and query counts cover the rest of the stack
+    'ratings.metrics.MetricsMiddleware',
+    # brotli or gzip, before anything else reads or writes response bodies
+    'ratings.compression.CompressionMiddleware',
+    # turns requests away before any work is done for them
+    'ratings.throttling.LoadSheddingMiddleware',
+    # before anything that reads the database
+    'ratings.replicas.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -78,10 +86,76 @@ WSGI_APPLICATION = 'profrates.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite pragmas applied to every new connection. "performance" uses write-ahead logging, so
+# readers never block the writer, and only syncs at checkpoints; "safe" keeps SQLite's defaults.
+# Pick one with the PROFRATES_SQLITE_PROFILE environment variable.
+SQLITE_PROFILES = {
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative: size in KiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,  # ms a writer waits for the lock before "database is locked"
+    },
+    'safe': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+}
+SQLITE_PROFILE = os.environ.get('PROFRATES_SQLITE_PROFILE', 'performance')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # keep connections open between requests instead of reconnecting every time
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PROFILES[SQLITE_PROFILE].items()),
+            # take the write lock when a transaction starts, so a reader never has to upgrade
+            # to a writer mid-transaction (which fails at once instead of waiting)
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_PROFILES[SQLITE_PROFILE]['busy_timeout'] / 1000,
+        },
+    }
+}
+
+# Read replicas. Reads go to a random replica and writes to 'default' (see
+# ratings.replicas.ReplicaRouter). PROFRATES_REPLICAS takes comma-separated SQLite files as
+# local stand-ins for real replicas; `manage.py sync_replicas` copies the primary into them.
+DATABASE_REPLICAS = []
+for index, name in enumerate(filter(None, os.environ.get('PROFRATES_REPLICAS', '').split(',')), start=1):
+    DATABASE_REPLICAS.append(f'replica{index}')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'NAME': name.strip(),
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            # refuse writes outright, in case anything bypasses the router
+            'init_command': DATABASES['default']['OPTIONS']['init_command'] + ';PRAGMA query_only=1',
+            'transaction_mode': None,
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['ratings.replicas.ReplicaRouter']
+
+# how long a client keeps reading from the primary after it writes, to cover replication lag
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# cached data (e.g. the teaching pair index) is only shared between workers when this points
+# at a shared backend such as Redis or Memcached; local memory is per process
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'profrates',
     }
 }
 
@@ -108,12 +182,50 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        # JWTAuthentication and TokenAuthentication, resolving users through the cache
+        'ratings.authentication.CachedJWTAuthentication',
+        'ratings.authentication.CachedTokenAuthentication',
     ),
         'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny', 
     ],
+    # token buckets for the views that set a throttle_scope (see ratings.throttling)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'ratings.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'rate': '60/min',
+        'rate-bulk': '10/min',
+        'register': '20/hour',
+        'auth': '30/min',
+    },
+}
+
+# cache holding the throttle buckets; needs a shared backend for budgets to span workers.
+# PROFRATES_THROTTLING=0 turns throttling off, e.g. for benchmarks
+THROTTLE_CACHE = 'default'
+THROTTLING_ENABLED = os.environ.get('PROFRATES_THROTTLING', '1') != '0'
+
+# per-worker limits past which requests are turned away with 503 before doing any work;
+# pending writes all queue on SQLite's single writer lock
+LOAD_SHEDDING = {
+    'MAX_IN_FLIGHT_REQUESTS': 256,
+    'MAX_PENDING_WRITES': 32,
+    'RETRY_AFTER': 1,
+    'EXEMPT_PATHS': ['/metrics'],
+}
+
+# write-behind for /rate/ (PROFRATES_WRITE_BEHIND=1): validated ratings are queued and answered
+# with 202 and a receipt, then written in batches by a background thread (see ratings.writebehind).
+# a batch is written once MAX_BATCH ratings wait or the oldest has waited MAX_DELAY seconds;
+# past MAX_QUEUE waiting, /rate/ answers 503. receipts need a shared cache to span workers
+WRITE_BEHIND_ENABLED = os.environ.get('PROFRATES_WRITE_BEHIND', '0') == '1'
+WRITE_BEHIND = {
+    'MAX_BATCH': 200,
+    'MAX_DELAY': 0.05,
+    'MAX_QUEUE': 5000,
+    'DRAIN_TIMEOUT': 30,
+    'RECEIPT_TIMEOUT': 3600,
 }
 
 SIMPLE_JWT = {
@@ -121,6 +233,18 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
 
+# seconds an authenticated user stays cached; saves and deletes invalidate it sooner
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# threads hashing passwords for the async register/login endpoints, and how many more
+# requests may wait for one before the rest are turned away with 503
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_QUEUE = 64
+
+# let write requests trust a valid JWT's claims instead of looking the user up at all;
+# a deactivated user's access token then keeps working until it expires
+AUTH_TRUST_JWT_CLAIMS_ON_WRITE = False
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -15,14 +15,16 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from django.urls import path, include
-from ratings.views import RegisterView, AuthToken, LogoutView, ListView, ViewView, AverageView, RateView
+from ratings.metrics import metrics_view
+from ratings.views import RegisterView, AuthToken, TokenView, LogoutView, ListView, ViewView, AverageView, RateView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('ratings.urls')),
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('metrics', metrics_view, name='metrics'),
+    path('token/', TokenView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('token-auth/', AuthToken.as_view(), name='token-auth'),
     path('register/', RegisterView.as_view(), name='register'),
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from .locking import retry_on_lock
+
+DEFAULT_HASHING_WORKERS = 4
+DEFAULT_HASHING_QUEUE = 64
+
+class AccountExists(Exception):
+    pass
+
+class HashingBusy(Exception):
+    pass
+
+# one insert, with the unique indexes on username and email doing the duplicate detection;
+# only a rejected insert pays for the query that works out which one clashed
+def create_account(username, email, password_hash):
+    user = User(
+        username=User.normalize_username(username),
+        email=User.objects.normalize_email(email),
+        password=password_hash,
+    )
+
+    def insert():
+        with transaction.atomic():
+            user.save(force_insert=True)
+
+    try:
+        retry_on_lock(insert)
+    except IntegrityError:
+        if User.objects.filter(username=user.username).exists():
+            raise AccountExists("Username already in use. Please choose a different username.")
+        raise AccountExists("Email already in use.")
+    return user
+
+# PBKDF2 releases the GIL, so a few threads hash in parallel without stalling the event loop.
+# the pool is bounded and so is its backlog: past that, callers are told to come back later
+# instead of queueing sign-ups for longer than any client will wait
+_hashing_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', DEFAULT_HASHING_WORKERS),
+    thread_name_prefix='password-hashing',
+)
+_hashing_slots = threading.BoundedSemaphore(
+    getattr(settings, 'PASSWORD_HASHING_WORKERS', DEFAULT_HASHING_WORKERS)
+    + getattr(settings, 'PASSWORD_HASHING_QUEUE', DEFAULT_HASHING_QUEUE)
+)
+
+async def run_hashing(func, *args):
+    if not _hashing_slots.acquire(blocking=False):
+        raise HashingBusy("Too many sign-ins in progress.")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hashing_pool, func, *args)
+    finally:
+        _hashing_slots.release()
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class RatingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ratings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .writebehind import install_shutdown_hooks, write_behind_enabled
+        if write_behind_enabled():
+            install_shutdown_hooks()
@@ -0,0 +1,193 @@
+"""
+Native async versions of the read and auth endpoints, for serving under ASGI.
+
+They answer with the same JSON as ListView, ViewView, AverageView, RegisterView and LoginView,
+but use the async ORM so a request waiting on the database does not tie up a sync_to_async
+worker thread. Password hashing runs on a small bounded pool (see ratings.accounts).
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+from .accounts import AccountExists, HashingBusy, create_account, run_hashing
+from .filters import filter_ratings
+from .locking import LockTimeout
+from .renderers import FastJSONRenderer
+from .throttling import aconsume, ip_ident
+from .models import Professor, Module, RatingAggregate
+from .fastpath import aprofessor_list_data, fast_view_page_data, fast_view_queryset
+from .pagination import KeysetPaginator
+from .teaching import ateaches
+from .versions import acatalogue_version
+from .views import LIST_CACHE_KEY, etag_matches, parse_view_options
+
+# render exactly as the DRF views do, so both paths send byte-identical bodies; /list/ and
+# /view/ pass FastJSONRenderer, as ListView and ViewView use it
+def json_response(data, status=200, renderer=JSONRenderer):
+    return HttpResponse(renderer().render(data), content_type='application/json', status=status)
+
+def busy_response():
+    response = json_response({"error": "The server is busy. Please try again."}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+# the 429 DRF sends for a throttled request
+def throttled_response(wait):
+    throttled = Throttled(wait)
+    response = json_response({"detail": throttled.detail}, status=throttled.status_code)
+    response['Retry-After'] = '%d' % throttled.wait
+    return response
+
+# JSON or form body, as the DRF views accept; None if it cannot be parsed
+def request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+# list professors + modules API (async) - list
+# shares its cache entries and ETags with the JSON representation of ListView
+class AsyncListView(View):
+    async def get(self, request):
+        version = await acatalogue_version()
+        etag = f'"{version}-json"'
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        cache_key = LIST_CACHE_KEY.format(version=version)
+        data = await cache.aget(cache_key)
+        if data is None:
+            data = await aprofessor_list_data(using=DEFAULT_DB_ALIAS)
+            await cache.aset(cache_key, data)
+
+        response = json_response(data, renderer=FastJSONRenderer)
+        response['ETag'] = etag
+        return response
+
+# view ratings API (async) - view
+class AsyncViewView(View):
+    async def get(self, request):
+        try:
+            fields, normalized = parse_view_options(request.GET)
+            ratings = filter_ratings(fast_view_queryset(fields), request.GET)
+            paginator = KeysetPaginator(request)
+        except ValidationError as e:
+            return json_response({"error": e.messages[0]}, status=400)
+
+        data = fast_view_page_data(paginator, await paginator.apaginate(ratings), fields, normalized)
+        return json_response(data, renderer=FastJSONRenderer)
+
+# average professor rating API (async) - average
+class AsyncAverageView(View):
+    async def get(self, request):
+        professor_id = request.GET.get('professor')
+        module_id = request.GET.get('module')
+
+        # error handling: professor and module id must be included
+        if not professor_id or not module_id:
+            return json_response({"error": "Please provide both professor and module ID."}, status=400)
+
+        # fast path: cached pair check, then one indexed read of the pre-computed totals
+        aggregate = None
+        if await ateaches(professor_id, module_id):
+            aggregate = await RatingAggregate.objects.filter(
+                professor_id=professor_id,
+                module_id=module_id,
+                rating_count__gt=0
+            ).values_list('rating_sum', 'rating_count').afirst()
+
+        if aggregate is not None:
+            rating_sum, rating_count = aggregate
+            return json_response({
+                "professor": professor_id,
+                "module": module_id,
+                "average_rating": round(rating_sum / rating_count)
+            })
+
+        # slow path: work out which error applies
+        try:
+            await Module.objects.aget(id=module_id)
+            await Professor.objects.aget(id=professor_id)
+            if not await ateaches(professor_id, module_id):
+                return json_response({"error": "Professor does not teach that module."}, status=400)
+            return json_response({"error": "No ratings found for that professor in that module."}, status=404)
+
+        except Module.DoesNotExist:
+            return json_response({"error": "Module not found."}, status=404)
+
+        except Professor.DoesNotExist:
+            return json_response({"error": "Professor not found."}, status=404)
+
+# user registration API (async) - register
+# csrf exempt like every DRF APIView; these endpoints take credentials, not cookies
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncRegisterView(View):
+    async def post(self, request):
+        # the same budgets as the throttle scopes of RegisterView and LoginView
+        wait = await aconsume('register', ip_ident(request))
+        if wait:
+            return throttled_response(wait)
+        data = request_data(request)
+        if data is None:
+            return json_response({"error": "Malformed request body."}, status=400)
+        username, email, password = data.get('username'), data.get('email'), data.get('password')
+
+        # error handling - check if all fields are provided
+        if not username or not email or not password:
+            return json_response(["All fields are required"], status=400)
+
+        try:
+            password_hash = await run_hashing(make_password, password)
+            await sync_to_async(create_account)(username, email, password_hash)
+        except AccountExists as e:
+            return json_response([str(e)], status=400)
+        except (HashingBusy, LockTimeout):
+            return busy_response()
+        return json_response(["Successfully registered! Please log in."], status=201)
+
+# user login API (async) - login
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    async def post(self, request):
+        wait = await aconsume('auth', ip_ident(request))
+        if wait:
+            return throttled_response(wait)
+        data = request_data(request)
+        if data is None:
+            return json_response({"error": "Malformed request body."}, status=400)
+        username, password = data.get('username'), data.get('password')
+
+        user = None
+        try:
+            if username and password:
+                user = await User.objects.filter(username=username).afirst()
+                if user is None:
+                    # hash anyway, like ModelBackend, so unknown usernames take as long as wrong passwords
+                    await run_hashing(make_password, password)
+                elif not (await run_hashing(user.check_password, password) and user.is_active):
+                    user = None
+        except HashingBusy:
+            return busy_response()
+
+        if user is None:
+            return json_response({'error': 'Credentials are invalid. Please try logging in again.'}, status=401)
+        refresh = RefreshToken.for_user(user)
+        return json_response({
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        })
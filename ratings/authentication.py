@@ -0,0 +1,92 @@
+"""
+JWT and Token authentication that resolve the user through Django's cache.
+
+The stock classes run a User query (and, for Token auth, a Token join) on every authenticated
+request. These keep the user, and the token -> user id mapping, in the cache for
+AUTH_USER_CACHE_TIMEOUT seconds; ratings.signals drops the entries whenever a user is saved
+(including deactivation and password changes) or deleted, or a token is deleted.
+
+With AUTH_TRUST_JWT_CLAIMS_ON_WRITE, write requests authenticated by a JWT skip the lookup
+entirely and get a stateless TokenUser built from the token's claims. That saves the cache
+round trip too, at the cost of accepting a deactivated user's token until it expires.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_KEY = 'ratings:auth:user:{pk}'
+TOKEN_CACHE_KEY = 'ratings:auth:token:{key}'
+DEFAULT_AUTH_CACHE_TIMEOUT = 60
+
+def auth_cache_timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', DEFAULT_AUTH_CACHE_TIMEOUT)
+
+# the user with this primary key, or None; filled from the primary so a lagging replica
+# cannot put an outdated user back right after an invalidation
+def cached_user(pk):
+    key = USER_CACHE_KEY.format(pk=pk)
+    user = cache.get(key)
+    if user is None:
+        User = get_user_model()
+        user = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=pk).first()
+        if user is not None:
+            cache.set(key, user, auth_cache_timeout())
+    return user
+
+def invalidate_user(pk):
+    cache.delete(USER_CACHE_KEY.format(pk=pk))
+
+def invalidate_token(key):
+    cache.delete(TOKEN_CACHE_KEY.format(key=key))
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        # DRF builds new authenticators for every request, so this is per request
+        self.writing = request.method not in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        if self.writing and getattr(settings, 'AUTH_TRUST_JWT_CLAIMS_ON_WRITE', False):
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        user = cached_user(user_id)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise exceptions.AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache_key = TOKEN_CACHE_KEY.format(key=key)
+        user_id = cache.get(cache_key)
+        if user_id is None:
+            user_id = Token.objects.using(DEFAULT_DB_ALIAS).filter(key=key).values_list('user_id', flat=True).first()
+            if user_id is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache.set(cache_key, user_id, auth_cache_timeout())
+
+        user = cached_user(user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # request.auth gets a token object as with TokenAuthentication, just not a fetched one
+        return (user, Token(key=key, user=user))
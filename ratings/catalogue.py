@@ -0,0 +1,160 @@
+import csv
+import json
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .models import Professor, Module
+from .teaching import invalidate_teaching_pairs
+from .versions import bump_catalogue_version
+
+CATALOGUE_FORMATS = ('csv', 'json')
+IMPORT_BATCH_SIZE = 1000
+# keeps every IN (...) list under SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+NAME_MAX_LENGTH = 100
+
+def chunked(values, size=LOOKUP_CHUNK_SIZE):
+    values = [*values]
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def clean_name(value, what, where):
+    name = str(value or '').strip()
+    if len(name) > NAME_MAX_LENGTH:
+        raise ValidationError(f"{where}: {what} name is longer than {NAME_MAX_LENGTH} characters.")
+    return name
+
+def clean_number(value, what, where):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValidationError(f"{where}: {what} must be a whole number.")
+
+# one catalogue entry -> (module key, professor names); a module with no professors is allowed
+def parse_entry(entry, where):
+    if not isinstance(entry, dict):
+        raise ValidationError(f"{where}: expected an object with module, year, semester and professor.")
+    module = clean_name(entry.get('module', entry.get('name')), 'module', where)
+    if not module:
+        raise ValidationError(f"{where}: module name is missing.")
+    year = clean_number(entry.get('year'), 'year', where)
+    semester = clean_number(entry.get('semester'), 'semester', where)
+
+    professors = entry.get('professors', entry.get('professor'))
+    if professors is None:
+        professors = []
+    elif isinstance(professors, str):
+        # CSV cells may list several professors separated by semicolons
+        professors = professors.split(';')
+    elif not isinstance(professors, list):
+        raise ValidationError(f"{where}: professors must be a name or a list of names.")
+    names = [clean_name(name, 'professor', where) for name in professors]
+    return (module, year, semester), [name for name in names if name]
+
+# read CSV (columns professor, module, year, semester - one row per assignment, or several
+# professors in one cell separated by ';') or a JSON list of objects with the same keys,
+# where "professors" may also be a list
+def read_catalogue(stream, catalogue_format):
+    if catalogue_format == 'csv':
+        reader = csv.DictReader(stream)
+        missing = {'module', 'year', 'semester'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValidationError(f"CSV is missing the column(s): {', '.join(sorted(missing))}.")
+        # the header is line 1
+        entries = ((row, f"Line {line}") for line, row in enumerate(reader, start=2))
+    else:
+        try:
+            data = json.load(stream)
+        except ValueError as e:
+            raise ValidationError(f"Invalid JSON: {e}")
+        if not isinstance(data, list):
+            raise ValidationError("JSON catalogue must be a list of modules.")
+        entries = ((entry, f"Entry {index}") for index, entry in enumerate(data, start=1))
+
+    catalogue = {}
+    for entry, where in entries:
+        module, professors = parse_entry(entry, where)
+        catalogue.setdefault(module, set()).update(professors)
+    return catalogue
+
+# work out what importing the catalogue would change, reading the database in batches
+def plan_import(catalogue, replace=False):
+    professor_names = set().union(*catalogue.values()) if catalogue else set()
+    professor_ids = {}
+    for names in chunked(professor_names):
+        # names are not unique in the table; reuse the oldest professor with a given name
+        for pk, name in Professor.objects.filter(name__in=names).order_by('-id').values_list('id', 'name'):
+            professor_ids[name] = pk
+
+    module_ids = {}
+    for names in chunked({name for name, _, _ in catalogue}):
+        rows = Module.objects.filter(name__in=names).order_by('-id').values_list('id', 'name', 'year', 'semester')
+        for pk, name, year, semester in rows:
+            if (name, year, semester) in catalogue:
+                module_ids[(name, year, semester)] = pk
+
+    Teaching = Module.professor.through
+    existing = set()
+    for ids in chunked(module_ids.values()):
+        existing.update(Teaching.objects.filter(module_id__in=ids).values_list('module_id', 'professor_id'))
+    modules_by_id = {pk: key for key, pk in module_ids.items()}
+    # professors already teaching an imported module need not appear in the file
+    professors_by_id = {pk: name for name, pk in professor_ids.items()}
+    for ids in chunked({pk for _, pk in existing} - professors_by_id.keys()):
+        professors_by_id.update(Professor.objects.filter(id__in=ids).values_list('id', 'name'))
+
+    wanted = {(module, name) for module, names in catalogue.items() for name in names}
+    current = {(modules_by_id[module_id], professors_by_id[professor_id]) for module_id, professor_id in existing}
+    removed = set()
+    if replace:
+        # each imported module ends up taught by exactly the professors listed for it
+        removed = {
+            (module_id, professor_id) for module_id, professor_id in existing
+            if (modules_by_id[module_id], professors_by_id[professor_id]) not in wanted
+        }
+    return {
+        'professor_ids': professor_ids,
+        'module_ids': module_ids,
+        'new_professors': sorted(professor_names - professor_ids.keys()),
+        'new_modules': sorted(catalogue.keys() - module_ids.keys()),
+        'new_assignments': sorted(wanted - current),
+        'removed_assignments': sorted(
+            (modules_by_id[module_id], professors_by_id[professor_id], module_id, professor_id)
+            for module_id, professor_id in removed
+        ),
+    }
+
+# write a plan with batched inserts; call inside a transaction. bulk_create sends no m2m or
+# save signals, so the teaching pair and catalogue caches are dropped here
+def apply_import(plan, batch_size=IMPORT_BATCH_SIZE):
+    professor_ids, module_ids = dict(plan['professor_ids']), dict(plan['module_ids'])
+
+    created = Professor.objects.bulk_create(
+        [Professor(name=name) for name in plan['new_professors']], batch_size=batch_size
+    )
+    professor_ids.update((professor.name, professor.id) for professor in created)
+    created = Module.objects.bulk_create(
+        [Module(name=name, year=year, semester=semester) for name, year, semester in plan['new_modules']],
+        batch_size=batch_size
+    )
+    module_ids.update(((module.name, module.year, module.semester), module.id) for module in created)
+
+    Teaching = Module.professor.through
+    Teaching.objects.bulk_create(
+        [
+            Teaching(module_id=module_ids[module], professor_id=professor_ids[name])
+            for module, name in plan['new_assignments']
+        ],
+        batch_size=batch_size,
+        ignore_conflicts=True
+    )
+
+    removed = defaultdict(list)
+    for _, _, module_id, professor_id in plan['removed_assignments']:
+        removed[module_id].append(professor_id)
+    for module_id, teacher_ids in removed.items():
+        Teaching.objects.filter(module_id=module_id, professor_id__in=teacher_ids).delete()
+
+    for invalidate in (invalidate_teaching_pairs, bump_catalogue_version):
+        invalidate()
+        transaction.on_commit(invalidate)
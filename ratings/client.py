@@ -1,8 +1,22 @@
 import requests
 import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "http://127.0.0.1:8000/"
 
+# upper bound on concurrent requests for the batch commands
+MAX_WORKERS = 8
+
+# one pooled, keep-alive session for every command instead of a new connection per call
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+
 # get_headers will return headers w authorization if logged in
 def get_headers():
     return {"Authorization": f"Bearer {TOKEN}"} if TOKEN else {}
@@ -28,7 +42,7 @@ def register():
         else:
             print("Password must be at least 6 characters long.")
 
-    response = requests.post(f"{BASE_URL}register/", json={
+    response = SESSION.post(f"{BASE_URL}register/", json={
     "username": username,
     "email": email,
     "password": password
@@ -43,7 +57,7 @@ def login():
     username = input("Username: ")
     password = input("Password: ")
 
-    response = requests.post(f"{BASE_URL}token/", json={"username": username, "password": password})
+    response = SESSION.post(f"{BASE_URL}token/", json={"username": username, "password": password})
     
     # login successful
     if response.status_code == 200:
@@ -66,7 +80,7 @@ def logout():
         return
     
     # parsing if user is already logged in
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}logout/",
         headers=get_headers()
     )
@@ -78,11 +92,19 @@ def logout():
     else:
         print("Error logging out. Try again.")
 
+# last /list/ response and its ETag, so unchanged catalogues come back as a bodiless 304
+LIST_CACHE = {"etag": None, "data": None}
+
 # list all professors - option 1 - list command
 def list():
-    response = requests.get(f"{BASE_URL}list/")
+    headers = {"If-None-Match": LIST_CACHE["etag"]} if LIST_CACHE["etag"] else {}
+    response = SESSION.get(f"{BASE_URL}list/", headers=headers)
     try:
-        data = response.json()
+        if response.status_code == 304:
+            data = LIST_CACHE["data"]
+        else:
+            data = response.json()
+            LIST_CACHE.update(etag=response.headers.get("ETag"), data=data)
         if not data:
             print("No professors found.")
             return
@@ -104,35 +126,50 @@ def list():
         
 
 # view all ratings - option 2 - view command
+# the server pages ratings by cursor, so keep following "next" until it runs out
 def view():
-    response = requests.get(f"{BASE_URL}view/")
-    data = response.json()
-    if not data:
+    url = f"{BASE_URL}view/"
+    printed_header = False
+
+    while url:
+        response = SESSION.get(url)
+        try:
+            data = response.json()
+        except requests.exceptions.JSONDecodeError:
+            print("Unexpected response from server.")
+            return
+
+        if response.status_code != 200:
+            print(f"Error: {data.get('error', 'Unable to fetch ratings.')}")
+            return
+
+        for rating in data["results"]:
+            if not printed_header:
+                print("\n--- View Ratings ---")
+                printed_header = True
+            professor = rating['professor']
+            print(f"Professor: {professor['name']} (ID: {professor['id']})")
+            module = rating['module']
+            print(f"    - Module: {module['name']} (Module ID: {module['id']}, Year: {module['year']}, Semester: {module['semester']})")  
+            print(f"        - Rating: {rating['rating']}")
+            print(f"        - Comment: {rating['comment']}")
+            print(f"        - Date: {rating['date']}")
+            print("-" * 50)
+
+        url = data["next"]
+
+    if not printed_header:
         print("No ratings found.")
         return
-    
-    print("\n--- View Ratings ---")
-    for rating in data:
-        professor = rating['professor']
-        print(f"Professor: {professor['name']} (ID: {professor['id']})")
-        module = rating['module']
-        print(f"    - Module: {module['name']} (Module ID: {module['id']}, Year: {module['year']}, Semester: {module['semester']})")  
-        print(f"        - Rating: {rating['rating']}")
-        print(f"        - Comment: {rating['comment']}")
-        print(f"        - Date: {rating['date']}")
-        print("-" * 50)
     print()
 
-    #response = requests.get(f"{BASE_URL}view/")
-    #print(response.json())
-
 # view average rating for a professor in a module - option 3 - average command
 def average():
     print("\n--- Find Average Rating ---")
     professor = input("Enter professor ID: ")
     module = input("Enter module ID: ")
 
-    response = requests.get(f"{BASE_URL}average/", params={"professor": professor, "module": module})
+    response = SESSION.get(f"{BASE_URL}average/", params={"professor": professor, "module": module})
     
     try:
         data = response.json()
@@ -151,6 +188,23 @@ def average():
     except requests.exceptions.JSONDecodeError:
         print("Unexpected response from server.")
 
+# a rating queued by a write-behind server is written within moments; check its receipt a few times
+RECEIPT_CHECKS = 5
+RECEIPT_CHECK_INTERVAL = 0.2
+
+# the receipt's latest state: created, failed, or still pending once we stop checking
+def wait_for_receipt(accepted):
+    state = accepted
+    for _ in range(RECEIPT_CHECKS):
+        time.sleep(RECEIPT_CHECK_INTERVAL)
+        response = SESSION.get(accepted["status_url"], headers=get_headers())
+        if response.status_code != 200:
+            break
+        state = response.json()
+        if state["status"] != "pending":
+            break
+    return state
+
 # rate a professor - option 4 - rate command
 TOKEN = None
 def rate():
@@ -166,9 +220,10 @@ def rate():
         professor = input("Enter professor ID: ")
         module = input("Enter module ID: ")
 
-        response = requests.post(
+        # dry run: the server checks the pair without writing a rating
+        response = SESSION.post(
             f"{BASE_URL}rate/",
-            json={"professor": professor, "module": module, "rating": 3, "comment": "Temporary check"},
+            json={"professor": professor, "module": module, "dry_run": True},
             headers=get_headers()
         )
 
@@ -188,7 +243,7 @@ def rate():
                     return 
                 
             # correct professor-module pair inputted
-            elif response.status_code == 201:
+            elif response.status_code == 200:
                 break 
             
             # another layer of error handling
@@ -213,7 +268,7 @@ def rate():
 
     comment = input("Leave a comment (optional): ")
 
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}rate/",
         json={"professor": professor, "module": module, "rating": rating, "comment": comment},
         headers=get_headers()
@@ -224,6 +279,15 @@ def rate():
         response_data = response.json()
         if response.status_code == 201:
             print("Rating submitted successfully!")
+        # accepted by a write-behind server: saved once its receipt says so
+        elif response.status_code == 202:
+            state = wait_for_receipt(response_data)
+            if state["status"] == "created":
+                print("Rating submitted successfully!")
+            elif state["status"] == "failed":
+                print(f"Error submitting rating: {state.get('error', 'Unknown error occurred.')}")
+            else:
+                print(f"Rating accepted and waiting to be saved (receipt {response_data['receipt']}).")
         else:
             print(f"Error submitting rating: {response_data.get('error', 'Unknown error occurred.')}")
     
@@ -231,6 +295,217 @@ def rate():
         print("Unexpected response from server.")
 
 
+# run fn over items on a bounded thread pool, returning (item, result, seconds) in input order
+def fan_out(fn, items):
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            result = fn(item)
+        except requests.exceptions.RequestException as e:
+            result = f"Request failed: {e}"
+        return item, result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        return [*pool.map(timed, items)]
+
+def print_timings(rows, started):
+    for label, result, seconds in rows:
+        print(f"{label:<20} {result:<45} {seconds * 1000:8.1f} ms")
+    print("-" * 50)
+    print(f"{len(rows)} calls in {(time.perf_counter() - started) * 1000:.1f} ms")
+    print()
+
+# average rating for one (professor, module) pair, as a printable string
+def fetch_average(pair):
+    professor, module = pair
+    response = SESSION.get(f"{BASE_URL}average/", params={"professor": professor, "module": module})
+    try:
+        data = response.json()
+    except requests.exceptions.JSONDecodeError:
+        return "Unexpected response from server."
+    if response.status_code == 200:
+        return f"{data['average_rating']} stars"
+    return f"Error: {data.get('error', 'Invalid request.')}"
+
+# every rating for one professor, following cursors, as a printable string
+def fetch_professor_ratings(professor):
+    url, params, ratings = f"{BASE_URL}view/", {"professor": professor}, []
+    while url:
+        response = SESSION.get(url, params=params)
+        try:
+            data = response.json()
+        except requests.exceptions.JSONDecodeError:
+            return "Unexpected response from server."
+        if response.status_code != 200:
+            return f"Error: {data.get('error', 'Unable to fetch ratings.')}"
+        ratings.extend(rating["rating"] for rating in data["results"])
+        url, params = data["next"], None
+    if not ratings:
+        return "No ratings found."
+    return f"{len(ratings)} ratings, mean {sum(ratings) / len(ratings):.2f} stars"
+
+# average ratings for many professor/module pairs at once - batch-average command
+def batch_average():
+    print("\n--- Batch Average Ratings ---")
+    pairs = []
+    for chunk in input("Enter professor:module pairs separated by commas (e.g. 1:2, 3:4): ").split(","):
+        professor, _, module = chunk.strip().partition(":")
+        if professor.strip() and module.strip():
+            pairs.append((professor.strip(), module.strip()))
+    if not pairs:
+        print("Please enter at least one professor:module pair.")
+        return
+
+    started = time.perf_counter()
+    rows = fan_out(fetch_average, pairs)
+    print_timings([(f"P{p} / M{m}", result, seconds) for (p, m), result, seconds in rows], started)
+
+# ratings for many professors at once - batch-view command
+def batch_view():
+    print("\n--- Batch View Ratings ---")
+    professors = [p.strip() for p in input("Enter professor IDs separated by commas: ").split(",") if p.strip()]
+    if not professors:
+        print("Please enter at least one professor ID.")
+        return
+
+    started = time.perf_counter()
+    rows = fan_out(fetch_professor_ratings, professors)
+    print_timings([(f"Professor {p}", result, seconds) for p, result, seconds in rows], started)
+
+
+# --- scripted mode: the same commands without prompts, returning (status, data) ---
+
+def api_call(method, path, **kwargs):
+    response = SESSION.request(method, f"{BASE_URL}{path}", headers=get_headers(), **kwargs)
+    try:
+        return response.status_code, response.json()
+    except requests.exceptions.JSONDecodeError:
+        return response.status_code, response.text
+
+def script_register(username, email, password):
+    return api_call("POST", "register/", json={"username": username, "email": email, "password": password})
+
+def script_login(username, password):
+    global TOKEN
+    status, data = api_call("POST", "token/", json={"username": username, "password": password})
+    if status == 200:
+        TOKEN = data["access"]
+        return status, {"logged_in": True}
+    return status, data
+
+def script_logout():
+    global TOKEN
+    status, data = api_call("POST", "logout/")
+    if status == 200:
+        TOKEN = None
+    return status, data
+
+def script_list():
+    return api_call("GET", "list/")
+
+def script_view(**filters):
+    status, data = api_call("GET", "view/", params=filters)
+    ratings = []
+    while status == 200:
+        ratings.extend(data["results"])
+        if not data["next"]:
+            return status, ratings
+        response = SESSION.get(data["next"], headers=get_headers())
+        status, data = response.status_code, response.json()
+    return status, data
+
+def script_average(professor, module):
+    return api_call("GET", "average/", params={"professor": professor, "module": module})
+
+def script_rate(professor, module, rating, comment=""):
+    return api_call("POST", "rate/", json={"professor": professor, "module": module, "rating": rating, "comment": comment})
+
+SCRIPT_COMMANDS = {
+    "register": script_register,
+    "login": script_login,
+    "logout": script_logout,
+    "list": script_list,
+    "view": script_view,
+    "average": script_average,
+    "rate": script_rate,
+}
+
+# reads can run concurrently; anything else waits for everything before it
+READ_COMMANDS = {"list", "view", "average"}
+
+# run one {"command": ..., **arguments} entry and describe the outcome as a dict
+def execute(entry):
+    number, command = entry
+    if "error" in command:
+        return {"line": number, "ok": False, "error": command["error"]}
+
+    arguments = {k: v for k, v in command.items() if k != "command"}
+    start = time.perf_counter()
+    try:
+        status, data = SCRIPT_COMMANDS[command["command"]](**arguments)
+        result = {"ok": status < 400, "status": status, "data": data}
+    except TypeError as e:
+        result = {"ok": False, "error": f"Bad arguments: {e}"}
+    except requests.exceptions.RequestException as e:
+        result = {"ok": False, "error": f"Request failed: {e}"}
+    elapsed = (time.perf_counter() - start) * 1000
+    return {"line": number, "command": command["command"], **result, "ms": round(elapsed, 2)}
+
+def check_command(command):
+    if not isinstance(command, dict) or command.get("command") not in SCRIPT_COMMANDS:
+        return {"error": f"Unknown command. Expected one of: {', '.join(SCRIPT_COMMANDS)}."}
+    return command
+
+# turn one JSONL line into a command dict, or an {"error": ...} placeholder
+def parse_command(line):
+    try:
+        return check_command(json.loads(line))
+    except ValueError as e:
+        return {"error": f"Invalid JSON: {e}"}
+
+# run commands in order, pipelining runs of consecutive reads, and write one JSON result per line
+def run_script(commands, out=sys.stdout):
+    failures = 0
+    pending_reads = []
+
+    def emit(results):
+        nonlocal failures
+        for result in results:
+            failures += not result["ok"]
+            out.write(json.dumps(result) + "\n")
+        out.flush()
+
+    def flush_reads():
+        if pending_reads:
+            emit(result for _, result, _ in fan_out(execute, pending_reads))
+            pending_reads.clear()
+
+    for entry in commands:
+        if entry[1].get("command") in READ_COMMANDS:
+            pending_reads.append(entry)
+        else:
+            flush_reads()
+            emit([execute(entry)])
+    flush_reads()
+    return failures
+
+def read_script(source):
+    stream = sys.stdin if source == "-" else open(source)
+    with stream:
+        for number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield number, parse_command(line)
+
+# "average professor=1 module=2" -> {"command": "average", "professor": "1", "module": "2"}
+def command_from_argv(command, arguments):
+    parsed = {"command": command}
+    for argument in arguments:
+        key, sep, value = argument.partition("=")
+        if not sep:
+            return {"error": f"Arguments must look like key=value, got {argument!r}."}
+        parsed[key] = value
+    return check_command(parsed)
+
 
 COMMANDS = {
     "register": register,
@@ -240,12 +515,14 @@ COMMANDS = {
     "view": view,
     "average": average,
     "rate": rate,
+    "batch-average": batch_average,
+    "batch-view": batch_view,
 }
 
 # CLI loop
-def main():
+def interactive():
     while True:
-        command = input("Enter a command (register, login, logout, list, view, average, rate, quit): ").strip()
+        command = input("Enter a command (register, login, logout, list, view, average, rate, batch-average, batch-view, quit): ").strip()
 
         if command == "quit":
             break
@@ -254,5 +531,25 @@ def main():
         else:
             print("Not a valid command.")
 
+# with no arguments this is the interactive client; otherwise run commands non-interactively
+def main(argv=None):
+    global BASE_URL
+    parser = argparse.ArgumentParser(description="Professor ratings client.")
+    parser.add_argument("command", nargs="?", help="Run a single command, e.g. average professor=1 module=2.")
+    parser.add_argument("arguments", nargs="*", help="key=value arguments for the command.")
+    parser.add_argument("--script", help="JSONL file of commands to run, or - for stdin.")
+    parser.add_argument("--base-url", default=BASE_URL)
+    options = parser.parse_args(argv)
+    BASE_URL = options.base_url
+
+    if options.script:
+        failures = run_script(read_script(options.script))
+    elif options.command:
+        failures = run_script([(1, command_from_argv(options.command, options.arguments))])
+    else:
+        interactive()
+        return 0
+    return 1 if failures else 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
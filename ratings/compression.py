@@ -0,0 +1,44 @@
+import re
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+# brotli is optional; without it every client that accepts gzip gets gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+
+
+# GZipMiddleware, preferring brotli for clients that accept it. brotli is kept to responses to
+# safe methods: those carry no credentials for a BREACH-style attack to recover, whereas POST
+# responses (tokens from /login/) fall through to gzip and its random-bytes mitigation
+class CompressionMiddleware(GZipMiddleware):
+    brotli_quality = 5
+
+    def process_response(self, request, response):
+        if (
+            brotli is None
+            or request.method not in ('GET', 'HEAD')
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < 200
+            or not ACCEPTS_BROTLI.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=self.brotli_quality)
+        # return the compressed content only if it's actually shorter
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(response.content))
+
+        # weak ETags, as GZipMiddleware sets them (RFC 9110 section 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,48 @@
+import csv
+import json
+from .models import Rating
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_CHUNK_SIZE = 2000
+
+# output column -> values() lookup; professor and module are joined into the same query
+EXPORT_COLUMNS = {
+    'id': 'id',
+    'professor_id': 'professor_id',
+    'professor_name': 'professor__name',
+    'module_id': 'module_id',
+    'module_name': 'module__name',
+    'module_year': 'module__year',
+    'module_semester': 'module__semester',
+    'rating': 'rating',
+    'comment': 'comment',
+    'date': 'date',
+}
+
+# stream rating rows as tuples in EXPORT_COLUMNS order, chunk_size rows in memory at a time
+def export_rows(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    if queryset is None:
+        queryset = Rating.objects.all()
+    rows = queryset.order_by('date', 'id').values_list(*EXPORT_COLUMNS.values())
+    for row in rows.iterator(chunk_size=chunk_size):
+        *head, date = row
+        yield (*head, date.isoformat())
+
+def ndjson_lines(rows):
+    columns = list(EXPORT_COLUMNS)
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row))) + "\n"
+
+# csv.writer wants a file; hand it one that just returns each formatted line
+class Echo:
+    def write(self, value):
+        return value
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(EXPORT_COLUMNS))
+    for row in rows:
+        yield writer.writerow(row)
+
+def export_lines(rows, export_format):
+    return csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
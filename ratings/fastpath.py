@@ -0,0 +1,90 @@
+"""
+Fast-path serialization for the hot read endpoints (/list/ and /view/).
+
+Responses are built straight from values_list() rows, without instantiating models or running
+serializer fields. Each builder produces exactly the data of the serializer or row function it
+stands in for: professor_list_data that of ProfessorSerializer, fast_view_page_data that of
+reference.view_page_data. `manage.py check_fast_serializers` proves the rendered bytes match.
+"""
+from collections import defaultdict
+from django.db import DEFAULT_DB_ALIAS
+from .models import Module, Professor, Rating
+
+PROFESSOR_COLUMNS = ('id', 'name')
+# (professor, module) assignments with the module's own columns, in assignment order
+TEACHING_COLUMNS = ('professor_id', 'module_id', 'module__name', 'module__year', 'module__semester')
+
+def module_lists(assignments):
+    modules = defaultdict(list)
+    for professor_id, module_id, name, year, semester in assignments:
+        modules[professor_id].append({"id": module_id, "name": name, "year": year, "semester": semester})
+    return modules
+
+def professor_list_rows(professors, modules):
+    return [{"id": pk, "name": name, "modules": modules[pk]} for pk, name in professors]
+
+def professor_list_queries(using):
+    return (
+        Professor.objects.using(using).values_list(*PROFESSOR_COLUMNS),
+        Module.professor.through.objects.using(using).values_list(*TEACHING_COLUMNS),
+    )
+
+# the /list/ data: every professor with the modules they teach
+def professor_list_data(using=DEFAULT_DB_ALIAS):
+    professors, assignments = professor_list_queries(using)
+    return professor_list_rows(professors, module_lists(assignments))
+
+async def aprofessor_list_data(using=DEFAULT_DB_ALIAS):
+    professors, assignments = professor_list_queries(using)
+    modules = module_lists([row async for row in assignments])
+    return professor_list_rows([row async for row in professors], modules)
+
+# the columns each /view/ row field is built from
+RATING_COLUMNS = {
+    'professor': ('professor_id', 'professor__name'),
+    'module': ('module_id', 'module__name', 'module__year', 'module__semester'),
+    'rating': ('rating',),
+    'comment': ('comment',),
+    'date': (),
+}
+
+def professor_entry(row):
+    if row.professor_id is None:
+        return None
+    return {"id": row.professor_id, "name": row.professor__name}
+
+def module_entry(row):
+    return {"id": row.module_id, "name": row.module__name, "year": row.module__year, "semester": row.module__semester}
+
+FAST_ROW_VALUES = {
+    'professor': professor_entry,
+    'module': module_entry,
+    'rating': lambda row: row.rating,
+    'comment': lambda row: row.comment,
+    'date': lambda row: row.date.isoformat(),
+}
+FAST_NORMALIZED_VALUES = {
+    **FAST_ROW_VALUES,
+    'professor': lambda row: row.professor_id,
+    'module': lambda row: row.module_id,
+}
+FAST_RELATED_FIELDS = {'professor': ('professors', professor_entry), 'module': ('modules', module_entry)}
+
+# the ratings to list as named rows; id and date are always there for the keyset paginator
+def fast_view_queryset(fields):
+    columns = [column for field in fields for column in RATING_COLUMNS[field]]
+    return Rating.objects.values_list('id', 'date', *columns, named=True)
+
+def fast_view_page_data(paginator, rows, fields, normalized):
+    values = FAST_NORMALIZED_VALUES if normalized else FAST_ROW_VALUES
+    data = paginator.get_paginated_response_data(
+        [{field: values[field](row) for field in fields} for row in rows]
+    )
+    if normalized:
+        for field, (key, entry) in FAST_RELATED_FIELDS.items():
+            if field in fields:
+                # a rating with no professor references none
+                data[key] = {
+                    str(getattr(row, f'{field}_id')): entry(row) for row in rows if getattr(row, f'{field}_id') is not None
+                }
+    return data
@@ -0,0 +1,59 @@
+from datetime import datetime, time
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# query parameters accepted by every ratings listing (view, export)
+RATING_FILTERS = ('professor', 'module', 'since', 'until', 'min_rating')
+
+# parse an integer query parameter, raising ValidationError on junk input
+def parse_int(params, name, minimum=None, maximum=None):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{name} must be an integer.")
+    if minimum is not None and value < minimum:
+        raise ValidationError(f"{name} must be at least {minimum}.")
+    if maximum is not None and value > maximum:
+        raise ValidationError(f"{name} must be at most {maximum}.")
+    return value
+
+# parse an ISO date or datetime; plain dates snap to the start/end of that day
+def parse_moment(params, name, end_of_day=False):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError(f"{name} must be an ISO 8601 date or datetime.")
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.get_default_timezone())
+    return moment
+
+# apply the professor/module/date/rating filters from a request to a Rating queryset
+def filter_ratings(queryset, params):
+    professor_id = parse_int(params, 'professor')
+    module_id = parse_int(params, 'module')
+    since = parse_moment(params, 'since')
+    until = parse_moment(params, 'until', end_of_day=True)
+    min_rating = parse_int(params, 'min_rating', minimum=1, maximum=5)
+
+    if professor_id is not None:
+        queryset = queryset.filter(professor_id=professor_id)
+    if module_id is not None:
+        queryset = queryset.filter(module_id=module_id)
+    if since is not None:
+        queryset = queryset.filter(date__gte=since)
+    if until is not None:
+        queryset = queryset.filter(date__lte=until)
+    if min_rating is not None:
+        queryset = queryset.filter(rating__gte=min_rating)
+    return queryset
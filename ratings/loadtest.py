@@ -0,0 +1,63 @@
+"""
+Minimal HTTP load generator shared by the benchmark commands.
+
+Each worker thread keeps its own keep-alive session, so the numbers measure the server
+rather than TCP handshakes on the client side.
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+# nearest-rank percentile of an already sorted list
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies, wall_time, errors):
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall_time, 1) if wall_time else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+# fire `total` requests at `concurrency` in flight; `make_request(i)` returns the
+# keyword arguments for requests.Session.request (method, url, params, json, headers ...)
+def run_load(make_request, total, concurrency):
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+            local.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        return local.session
+
+    def one(i):
+        kwargs = make_request(i)
+        start = time.perf_counter()
+        try:
+            response = session().request(**kwargs)
+            response.content
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    wall_time = time.perf_counter() - start
+
+    latencies = [elapsed for elapsed, _ in results]
+    errors = sum(1 for _, ok in results if not ok)
+    return summarize(latencies, wall_time, errors)
@@ -0,0 +1,30 @@
+import random
+import time
+from django.db import OperationalError, connection
+
+LOCK_RETRY_ATTEMPTS = 5
+LOCK_RETRY_BASE_DELAY = 0.05
+LOCK_RETRY_MAX_DELAY = 1.0
+
+# SQLite reports a writer it waited on past busy_timeout as "database is locked" (or
+# "database table is locked"); other databases handle contention themselves
+def is_lock_error(error):
+    return connection.vendor == 'sqlite' and 'locked' in str(error).lower()
+
+class LockTimeout(Exception):
+    pass
+
+# run a write that opens its own transaction, retrying with jittered exponential backoff while
+# SQLite's write lock is contended. inside an outer transaction nothing is retried: the outer
+# block has already been rolled back by the failure and must fail as a whole
+def retry_on_lock(write, attempts=LOCK_RETRY_ATTEMPTS, base_delay=LOCK_RETRY_BASE_DELAY):
+    for attempt in range(attempts):
+        try:
+            return write()
+        except OperationalError as e:
+            if not is_lock_error(e) or connection.in_atomic_block:
+                raise
+            if attempt == attempts - 1:
+                raise LockTimeout(f"Database still locked after {attempts} attempts.") from e
+            delay = min(LOCK_RETRY_MAX_DELAY, base_delay * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
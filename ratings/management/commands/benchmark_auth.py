@@ -0,0 +1,59 @@
+import json
+import uuid
+from django.core.management.base import BaseCommand
+from ratings.loadtest import run_load
+
+# flow -> (path on the WSGI server, path on the ASGI server)
+AUTH_ENDPOINTS = {
+    'register': ('api/register/', 'api/async/register/'),
+    'login': ('api/login/', 'api/async/login/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure sign-up and login throughput under concurrency: the sync endpoints on a WSGI "
+        "server against the async ones on an ASGI server, e.g. `manage.py runserver 8000` and "
+        "`uvicorn profrates.asgi:application --port 8001`, both on the same database and started "
+        "with PROFRATES_THROTTLING=0. Every sign-up creates a real account, named with --prefix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000/')
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8001/')
+        parser.add_argument('--servers', nargs='+', choices=('wsgi', 'asgi'), default=['wsgi', 'asgi'])
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32, 128])
+        parser.add_argument('--requests', type=int, default=500, help="Requests per flow per level.")
+        parser.add_argument('--prefix', default='bench-auth')
+        parser.add_argument('--password', default='bench-auth-password')
+        parser.add_argument('--output', '-o', help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        results = []
+        for server in options['servers']:
+            base_url = (options['wsgi_url'] if server == 'wsgi' else options['asgi_url']).rstrip('/') + '/'
+            register_url, login_url = (base_url + AUTH_ENDPOINTS[flow][server == 'asgi'] for flow in ('register', 'login'))
+            for concurrency in options['concurrency']:
+                # fresh usernames for every level, so each sign-up is a real insert
+                names = [f"{options['prefix']}-{run}-{server}-{concurrency}-{i}" for i in range(options['requests'])]
+                flows = {
+                    'register': lambda i: {'method': 'POST', 'url': register_url, 'json': {
+                        'username': names[i], 'email': f'{names[i]}@example.com', 'password': options['password']
+                    }},
+                    # log the accounts just created back in
+                    'login': lambda i: {'method': 'POST', 'url': login_url, 'json': {
+                        'username': names[i], 'password': options['password']
+                    }},
+                }
+                for flow, make_request in flows.items():
+                    stats = run_load(make_request, total=options['requests'], concurrency=concurrency)
+                    results.append({'flow': flow, 'server': server, 'concurrency': concurrency, **stats})
+                    self.stdout.write(
+                        f"{flow:8} {server} c={concurrency:<4} {stats['throughput_rps']:>8} req/s  "
+                        f"p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms errors={stats['errors']}"
+                    )
+
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                json.dump(results, out, indent=2)
@@ -0,0 +1,116 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import QueryDict
+from ratings.filters import filter_ratings
+from ratings.models import Rating
+from ratings.search import FTS_TABLE, parse_search_query, search_ratings
+from ratings.seeding import throwaway_dataset
+
+# comments are drawn from these, so some words are common and others rare
+COMMON_WORDS = ['lectures', 'notes', 'exam', 'clear', 'helpful', 'module', 'slides', 'tutorials']
+RARE_WORDS = ['inspiring', 'disorganised', 'labyrinthine', 'punctual', 'enthusiastic', 'monotone']
+FILLER_WORDS = ['the', 'were', 'very', 'quite', 'and', 'but', 'always', 'never', 'really', 'a', 'bit']
+
+# (label, search query) pairs; the LIKE scan matches every word anywhere in the comment
+SEARCHES = [
+    ('common word', 'lectures'),
+    ('rare word', 'labyrinthine'),
+    ('two words', 'clear slides'),
+    ('prefix', 'enthus*'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset with varied comments inside a transaction and time the first page "
+        "of comment searches through the FTS5 index against icontains (LIKE) scans of the rating "
+        "table, with and without a professor filter. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ratings', type=int, default=50000)
+        parser.add_argument('--professors', type=int, default=200)
+        parser.add_argument('--modules', type=int, default=400)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=10, help="Timed runs of each search; the median is reported.")
+        parser.add_argument('--seed', type=int, default=3011)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The comment index is an SQLite FTS5 table.")
+        with throwaway_dataset(
+            users=50,
+            professors=options['professors'],
+            modules=options['modules'],
+            ratings=options['ratings'],
+            prefix='search-bench',
+            seed=options['seed'],
+            password=None
+        ) as seeded:
+            self.write_comments(random.Random(options['seed']))
+            professor_id = seeded['pairs'][0][0]
+            for label, text in SEARCHES:
+                for filters in ({}, {'professor': professor_id}):
+                    self.compare(label, text, filters, options)
+
+    # replace the seeded comments with varied ones; the update trigger reindexes each
+    def write_comments(self, rng):
+        def comment():
+            words = rng.choices(FILLER_WORDS, k=rng.randint(3, 10)) + rng.choices(COMMON_WORDS, k=rng.randint(1, 3))
+            if rng.random() < 0.02:
+                words.append(rng.choice(RARE_WORDS))
+            rng.shuffle(words)
+            return ' '.join(words).capitalize() + '.'
+
+        ids = Rating.objects.values_list('id', flat=True)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {Rating._meta.db_table} SET comment = %s WHERE id = %s', [(comment(), pk) for pk in ids]
+            )
+
+    def compare(self, label, text, filters, options):
+        params = QueryDict(mutable=True)
+        params.update({key: str(value) for key, value in filters.items()})
+        query = parse_search_query(QueryDict(f'q={text}'))
+        page_size = options['page_size']
+
+        like_matches = filter_ratings(Rating.objects.all(), params)
+        for word in text.rstrip('*').split():
+            like_matches = like_matches.filter(comment__icontains=word)
+
+        def fts_count():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [query])
+                return cursor.fetchone()[0]
+
+        # a ranked first page against LIKE's first page in date order, which can stop at the
+        # first matches it meets; then counting every match, which cannot
+        scope = f"professor {params['professor']}" if 'professor' in params else 'all ratings'
+        fts, fts_rows = self.time(lambda: search_ratings(query, params, limit=page_size), options['repeat'])
+        like, like_rows = self.time(
+            lambda: list(like_matches.order_by('date', 'id').values_list('id', flat=True)[:page_size]),
+            options['repeat']
+        )
+        self.report(label, scope, 'first page', fts, len(fts_rows), like, len(like_rows))
+        if not filters:
+            fts, fts_total = self.time(fts_count, options['repeat'])
+            like, like_total = self.time(like_matches.count, options['repeat'])
+            self.report(label, scope, 'all matches', fts, fts_total, like, like_total)
+
+    def report(self, label, scope, measure, fts, fts_rows, like, like_rows):
+        self.stdout.write(
+            f"{label:12} {scope:14} {measure:12} fts {fts:8.2f}ms ({fts_rows} rows)  "
+            f"like {like:8.2f}ms ({like_rows} rows)  {like / fts:6.1f}x"
+        )
+
+    # median milliseconds, and the result of the last run
+    def time(self, search, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = search()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
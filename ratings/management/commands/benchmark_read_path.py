@@ -0,0 +1,57 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from ratings.loadtest import run_load
+from ratings.models import RatingAggregate
+
+# endpoint -> (path on the WSGI server, path on the ASGI server)
+READ_ENDPOINTS = {
+    'list': ('api/list/', 'api/async/list/'),
+    'view': ('api/view/', 'api/async/view/'),
+    'average': ('api/average/', 'api/async/average/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and tail latency of the sync read endpoints on a WSGI server with the "
+        "async ones on an ASGI server, e.g. `manage.py runserver 8000` against "
+        "`uvicorn profrates.asgi:application --port 8001`, both on the same database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000/')
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8001/')
+        parser.add_argument('--endpoints', nargs='+', choices=READ_ENDPOINTS, default=list(READ_ENDPOINTS))
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per endpoint per level.")
+        parser.add_argument('--output', '-o', help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        # /average/ needs a pair that actually has ratings
+        pair = RatingAggregate.objects.filter(rating_count__gt=0).values_list('professor_id', 'module_id').first()
+        if 'average' in options['endpoints'] and pair is None:
+            raise CommandError("No rated professor/module pair found; seed some ratings first.")
+
+        results = []
+        for endpoint in options['endpoints']:
+            params = {'professor': pair[0], 'module': pair[1]} if endpoint == 'average' else None
+            for concurrency in options['concurrency']:
+                for server, base_url, path in (
+                    ('wsgi', options['wsgi_url'], READ_ENDPOINTS[endpoint][0]),
+                    ('asgi', options['asgi_url'], READ_ENDPOINTS[endpoint][1]),
+                ):
+                    url = base_url.rstrip('/') + '/' + path
+                    stats = run_load(
+                        lambda i: {'method': 'GET', 'url': url, 'params': params},
+                        total=options['requests'],
+                        concurrency=concurrency
+                    )
+                    results.append({'endpoint': endpoint, 'server': server, 'concurrency': concurrency, **stats})
+                    self.stdout.write(
+                        f"{endpoint:8} {server} c={concurrency:<4} {stats['throughput_rps']:>8} req/s  "
+                        f"p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms errors={stats['errors']}"
+                    )
+
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                json.dump(results, out, indent=2)
@@ -0,0 +1,80 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from ratings.fastpath import fast_view_page_data, fast_view_queryset, professor_list_data
+from ratings.models import Professor
+from ratings.pagination import MAX_PAGE_SIZE, KeysetPaginator
+from ratings.reference import view_page_data, view_queryset
+from ratings.renderers import FastJSONRenderer, orjson
+from ratings.seeding import request_host, throwaway_dataset
+from ratings.serializers import ProfessorSerializer
+from ratings.views import parse_view_options
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset inside a transaction and time building and rendering the /list/ "
+        "response and a full /view/ page, through the serializers and JSONRenderer against the "
+        "fast path (ratings.fastpath) and FastJSONRenderer. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ratings', type=int, default=50000)
+        parser.add_argument('--professors', type=int, default=200)
+        parser.add_argument('--modules', type=int, default=400)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs of each case; the median is reported.")
+        parser.add_argument('--seed', type=int, default=3011)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson is not installed; FastJSONRenderer falls back to JSONRenderer.")
+        request = APIRequestFactory(SERVER_NAME=request_host()).get('/api/view/', {'page_size': MAX_PAGE_SIZE})
+        fields, normalized = parse_view_options(request.GET)
+        reference, fast = JSONRenderer(), FastJSONRenderer()
+
+        def view_page(queryset, page_data):
+            paginator = KeysetPaginator(request)
+            return page_data(paginator, paginator.paginate(queryset(fields)), fields, normalized)
+
+        cases = {
+            'list': (
+                lambda: ProfessorSerializer(Professor.objects.prefetch_related('module_set'), many=True).data,
+                professor_list_data,
+            ),
+            'view': (
+                lambda: view_page(view_queryset, view_page_data),
+                lambda: view_page(fast_view_queryset, fast_view_page_data),
+            ),
+        }
+        with throwaway_dataset(
+            users=50,
+            professors=options['professors'],
+            modules=options['modules'],
+            ratings=options['ratings'],
+            prefix='serializer-bench',
+            seed=options['seed'],
+            password=None
+        ):
+            for name, (serialized, fast_path) in cases.items():
+                self.report(name, 'serializers', self.time(serialized, reference.render, options['repeat']))
+                self.report(name, 'fast path', self.time(fast_path, fast.render, options['repeat']))
+
+    # median (build, render) milliseconds, queries included in the build
+    def time(self, build, render, repeat):
+        builds, renders = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = build()
+            built = time.perf_counter()
+            render(data)
+            builds.append((built - start) * 1000)
+            renders.append((time.perf_counter() - built) * 1000)
+        return statistics.median(builds), statistics.median(renders)
+
+    def report(self, name, path, timings):
+        build, render = timings
+        self.stdout.write(
+            f"{name:5} {path:12} build {build:8.2f}ms  render {render:7.2f}ms  total {build + render:8.2f}ms"
+        )
@@ -0,0 +1,124 @@
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from ratings.fastpath import aprofessor_list_data, fast_view_page_data, fast_view_queryset, professor_list_data
+from ratings.filters import filter_ratings
+from ratings.models import Professor, Rating
+from ratings.pagination import KeysetPaginator
+from ratings.reference import view_page_data, view_queryset
+from ratings.renderers import FastJSONRenderer, orjson
+from ratings.seeding import request_host, throwaway_dataset
+from ratings.serializers import ProfessorSerializer
+from ratings.views import parse_view_options
+
+# comments the encoders are most likely to disagree on
+AWKWARD_COMMENTS = [
+    None,
+    '',
+    'Plain text.',
+    'Quotes " and \\ backslashes / slashes',
+    'Control characters \n \r \t \b \f \x00 \x1f \x7f',
+    'Line and paragraph separators',
+    'Non-ASCII: café, Ünïcödé, 日本語, emoji \U0001F600',
+]
+
+# every this many of the awkward ratings has no professor
+PROFESSORLESS_EVERY = 11
+
+# /view/ query strings compared, each walked for a few pages
+VIEW_PARAMS = [
+    {},
+    {'shape': 'normalized'},
+    {'fields': 'rating,date'},
+    {'fields': 'comment,module'},
+    {'shape': 'normalized', 'fields': 'professor,rating'},
+    {'shape': 'normalized', 'fields': 'module,comment,date'},
+    {'min_rating': 4, 'page_size': 7},
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset inside a transaction and check that the fast-path /list/ and "
+        "/view/ responses (ratings.fastpath, rendered by FastJSONRenderer) are byte-for-byte the "
+        "ones ProfessorSerializer and the model-instance /view/ path give under JSONRenderer. "
+        "Exits non-zero on any difference. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ratings', type=int, default=5000)
+        parser.add_argument('--professors', type=int, default=50)
+        parser.add_argument('--modules', type=int, default=100)
+        parser.add_argument('--pages', type=int, default=3, help="Pages of each /view/ variant to compare.")
+        parser.add_argument('--seed', type=int, default=3011)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson is not installed; FastJSONRenderer falls back to JSONRenderer.")
+        self.factory = APIRequestFactory(SERVER_NAME=request_host())
+        self.reference, self.fast = JSONRenderer(), FastJSONRenderer()
+        failures = []
+        with throwaway_dataset(
+            users=20,
+            professors=options['professors'],
+            modules=options['modules'],
+            ratings=options['ratings'],
+            prefix='serializer-check',
+            seed=options['seed'],
+            password=None
+        ):
+            self.write_awkward_values()
+            failures.extend(self.check_list())
+            for params in VIEW_PARAMS:
+                failures.extend(self.check_view(params, options['pages']))
+
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} fast-path responses differ from the serializers'.")
+        self.stdout.write(self.style.SUCCESS("Every fast-path response matches the serializers byte for byte."))
+
+    def write_awkward_values(self):
+        # every awkward comment, repeatedly, on the first pages the check walks
+        ids = Rating.objects.order_by('date', 'id').values_list('id', flat=True)[:200]
+        for index, pk in enumerate(ids):
+            Rating.objects.filter(pk=pk).update(comment=AWKWARD_COMMENTS[index % len(AWKWARD_COMMENTS)])
+        # professor is nullable; a few of those pages' ratings have none
+        Rating.objects.filter(pk__in=list(ids[::PROFESSORLESS_EVERY])).update(professor=None)
+
+    def compare(self, name, expected, actual):
+        if expected == actual:
+            return []
+        at = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+        return [f"{name}: differs at byte {at}\n    expected {expected[at - 40:at + 40]!r}\n    got      {actual[at - 40:at + 40]!r}"]
+
+    def check_list(self):
+        expected = self.reference.render(
+            ProfessorSerializer(Professor.objects.prefetch_related('module_set'), many=True).data
+        )
+        return [
+            *self.compare('list', expected, self.fast.render(professor_list_data())),
+            *self.compare('list (async)', expected, self.fast.render(async_to_sync(aprofessor_list_data)())),
+        ]
+
+    def check_view(self, params, pages):
+        failures = []
+        position = None
+        for page in range(pages):
+            request = self.factory.get('/api/view/', params)
+            fields, normalized = parse_view_options(request.GET)
+            reference, fast = KeysetPaginator(request), KeysetPaginator(request)
+            reference.position = fast.position = position
+
+            expected = self.reference.render(view_page_data(
+                reference, reference.paginate(filter_ratings(view_queryset(fields), request.GET)), fields, normalized
+            ))
+            actual = self.fast.render(fast_view_page_data(
+                fast, fast.paginate(filter_ratings(fast_view_queryset(fields), request.GET)), fields, normalized
+            ))
+            failures.extend(self.compare(f"view {params or 'default'} page {page + 1}", expected, actual))
+            if fast.next_position is None:
+                break
+            position = fast.next_position
+        return failures
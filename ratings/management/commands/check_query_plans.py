@@ -0,0 +1,135 @@
+import re
+from urllib.parse import parse_qs, urlparse
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+from ratings.seeding import request_host, throwaway_dataset
+
+# "SCAN ratings_rating" with no "USING ... INDEX" means SQLite reads the whole table
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+# tables that are meant to be read in full: /list/ returns every professor, and the
+# teaching pair cache loads every assignment when it is (re)filled. "hits" is not a table but
+# the page of /search/ matches, cut down to page size before it is joined to the ratings
+EXPECTED_FULL_SCANS = {'ratings_professor', 'ratings_module_professor', 'hits'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset inside a transaction, call every ratings endpoint and check "
+        "EXPLAIN QUERY PLAN for each query it runs; exits non-zero if any query falls back to a "
+        "full table scan. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ratings', type=int, default=50000)
+        parser.add_argument('--professors', type=int, default=200)
+        parser.add_argument('--modules', type=int, default=400)
+        parser.add_argument('--seed', type=int, default=3011)
+        parser.add_argument('--show-plans', action='store_true', help="Print every query plan.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("check_query_plans reads SQLite's EXPLAIN QUERY PLAN output.")
+
+        self.show_plans = options['show_plans']
+        self.factory = APIRequestFactory(SERVER_NAME=request_host())
+        failures = []
+        with throwaway_dataset(
+            users=50,
+            professors=options['professors'],
+            modules=options['modules'],
+            ratings=options['ratings'],
+            days=30,
+            prefix='plan-check',
+            seed=options['seed'],
+            password=None
+        ) as dataset:
+            professor_id, module_id = dataset['pairs'][0]
+            seeded = {'user': dataset['users'][0], 'professor': professor_id, 'module': module_id}
+            for name, method, path, data in self.endpoint_requests(seeded):
+                failures.extend(self.check_endpoint(name, method, path, data, seeded['user']))
+
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} endpoint queries are not served by an index.")
+        self.stdout.write(self.style.SUCCESS("Every endpoint query is served by an index."))
+
+    def endpoint_requests(self, seeded):
+        professor, module = seeded['professor'], seeded['module']
+        pair = {'professor': professor, 'module': module}
+        return [
+            ('list', 'get', '/api/list/', None),
+            ('view', 'get', '/api/view/', None),
+            ('view (next page)', 'get', '/api/view/', ('next', None)),
+            ('view by professor and module', 'get', '/api/view/', pair),
+            ('view by module', 'get', '/api/view/', {'module': module}),
+            ('view by date range', 'get', '/api/view/', {'since': '2000-01-01', 'until': '2100-01-01'}),
+            ('view normalized, sparse', 'get', '/api/view/', {'shape': 'normalized', 'fields': 'professor,rating'}),
+            ('export', 'get', '/api/export/', pair),
+            ('search', 'get', '/api/search/', {'q': 'lectures'}),
+            ('search by professor and module', 'get', '/api/search/', {'q': 'clear notes', **pair}),
+            ('search (next page)', 'get', '/api/search/', ('next', {'q': 'lectures'})),
+            ('average', 'get', '/api/average/', pair),
+            ('professor summary', 'get', '/api/professors/summary/', None),
+            ('leaderboard', 'get', '/api/leaderboard/', {'weighted': 'true'}),
+            ('trends by professor and module', 'get', '/api/trends/', {**pair, 'period': 'day'}),
+            ('trends by module', 'get', '/api/trends/', {'module': module, 'since': '2000-01-01'}),
+            ('trends overall', 'get', '/api/trends/', {'since': '2000-01-01', 'until': '2100-01-01'}),
+            ('rate', 'post', '/api/rate/', {**pair, 'rating': 4, 'comment': 'plan check'}),
+            ('rate bulk', 'post', '/api/rate/bulk/', [{**pair, 'rating': 5}] * 10),
+            ('register', 'post', '/api/register/', {
+                'username': 'plan-check-new', 'email': 'plan-check-new@example.com', 'password': 'plan-check'
+            }),
+        ]
+
+    def call(self, method, path, data, user):
+        if method == 'get':
+            request = self.factory.get(path, data)
+        else:
+            request = self.factory.post(path, data, format='json')
+        force_authenticate(request, user=user)
+        match = resolve(path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        return response
+
+    def check_endpoint(self, name, method, path, data, user):
+        if isinstance(data, tuple):
+            # keyset pages after the first one filter on the cursor, so check that plan too
+            first = self.call('get', path, data[1], user)
+            data = {k: v[0] for k, v in parse_qs(urlparse(first.data['next']).query).items()}
+
+        # the query log is a bounded deque; once seeding has filled it, CaptureQueriesContext
+        # would slice out nothing, so start every capture from an empty log
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.call(method, path, data, user)
+        if len(connection.queries_log) == connection.queries_log.maxlen:
+            raise CommandError(f"{name}: too many queries to capture.")
+
+        failures = []
+        if response.status_code >= 400:
+            failures.append(f"{name}: {method.upper()} {path} returned HTTP {response.status_code}")
+
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+
+            if self.show_plans:
+                self.stdout.write(f"{name}: {sql}\n    " + "\n    ".join(plan))
+            for step in plan:
+                scan = FULL_SCAN.match(step)
+                if scan and scan.group(1) not in EXPECTED_FULL_SCANS:
+                    failures.append(f"{name}: full scan of {scan.group(1)}\n    {sql}")
+        return failures
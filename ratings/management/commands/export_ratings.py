@@ -0,0 +1,40 @@
+import sys
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from ratings.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines, export_rows
+from ratings.filters import filter_ratings
+from ratings.models import Rating
+
+
+class Command(BaseCommand):
+    help = "Stream ratings as NDJSON or CSV to stdout or a file, with the same filters as /view/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', '-o', help="File to write to (default: stdout).")
+        parser.add_argument('--professor')
+        parser.add_argument('--module')
+        parser.add_argument('--since', help="ISO date or datetime.")
+        parser.add_argument('--until', help="ISO date or datetime.")
+        parser.add_argument('--min-rating')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = {
+            'professor': options['professor'],
+            'module': options['module'],
+            'since': options['since'],
+            'until': options['until'],
+            'min_rating': options['min_rating'],
+        }
+        try:
+            ratings = filter_ratings(Rating.objects.all(), params)
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        rows = export_rows(ratings, chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                out.writelines(export_lines(rows, options['format']))
+        else:
+            sys.stdout.writelines(export_lines(rows, options['format']))
@@ -0,0 +1,108 @@
+import gzip
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from ratings.compression import CompressionMiddleware, brotli
+from ratings.fastpath import fast_view_page_data, fast_view_queryset
+from ratings.pagination import MAX_PAGE_SIZE, KeysetPaginator
+from ratings.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+from ratings.seeding import request_host, throwaway_dataset
+from ratings.views import parse_view_options
+
+# /view/ query strings compared against the default nested page with every field
+VARIANTS = {
+    'nested': {},
+    'normalized': {'shape': 'normalized'},
+    'nested, sparse': {'fields': 'professor,rating,date'},
+    'normalized, sparse': {'shape': 'normalized', 'fields': 'professor,rating,date'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset inside a transaction, build full /view/ pages in each response "
+        "shape and report the payload size and the time to build, render and compress them as "
+        "JSON, MessagePack, gzip and brotli. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ratings', type=int, default=50000)
+        parser.add_argument('--professors', type=int, default=200)
+        parser.add_argument('--modules', type=int, default=400)
+        parser.add_argument('--pages', type=int, default=20, help="Pages of each variant to build.")
+        parser.add_argument('--page-size', type=int, default=MAX_PAGE_SIZE)
+        parser.add_argument('--seed', type=int, default=3011)
+
+    def handle(self, *args, **options):
+        if not 1 <= options['page_size'] <= MAX_PAGE_SIZE:
+            raise CommandError(f"--page-size must be between 1 and {MAX_PAGE_SIZE}.")
+        self.factory = APIRequestFactory(SERVER_NAME=request_host())
+        with throwaway_dataset(
+            users=50,
+            professors=options['professors'],
+            modules=options['modules'],
+            ratings=options['ratings'],
+            prefix='payload-check',
+            seed=options['seed'],
+            password=None
+        ):
+            results = {name: self.measure(params, options) for name, params in VARIANTS.items()}
+
+        if msgpack is None:
+            self.stdout.write("msgpack is not installed; MessagePack columns are skipped.")
+        if brotli is None:
+            self.stdout.write("brotli is not installed; brotli columns are skipped.")
+
+        baseline = results['nested']['json'][0]
+        self.stdout.write(
+            f"{options['pages']} pages of {options['page_size']} ratings; "
+            "bytes per page and ms per page (build + render + compress)"
+        )
+        for name, encodings in results.items():
+            self.stdout.write(f"{name} (build {encodings.pop('build'):.2f}ms)")
+            for encoding, (size, elapsed) in encodings.items():
+                self.stdout.write(
+                    f"    {encoding:13} {size:>10.0f} bytes ({size / baseline:6.1%} of nested JSON) {elapsed:8.2f}ms"
+                )
+
+    # average bytes and milliseconds per page for every encoding of one /view/ variant
+    def measure(self, params, options):
+        fields, normalized = parse_view_options(params)
+        encoders = {'json': FastJSONRenderer().render}
+        if msgpack is not None:
+            encoders['msgpack'] = MessagePackRenderer().render
+        compressors = {'gzip': gzip.compress}
+        if brotli is not None:
+            compressors['br'] = lambda content: brotli.compress(content, quality=CompressionMiddleware.brotli_quality)
+
+        totals = {'build': 0.0}
+        position = None
+        for _ in range(options['pages']):
+            request = self.factory.get('/api/view/', {**params, 'page_size': options['page_size']})
+            paginator = KeysetPaginator(request)
+            paginator.position = position
+
+            start = time.perf_counter()
+            data = fast_view_page_data(paginator, paginator.paginate(fast_view_queryset(fields)), fields, normalized)
+            totals['build'] += time.perf_counter() - start
+            position = paginator.next_position
+
+            for encoding, render in encoders.items():
+                start = time.perf_counter()
+                content = render(data)
+                rendered = time.perf_counter() - start
+                self.add(totals, encoding, len(content), rendered)
+                for compression, compress in compressors.items():
+                    start = time.perf_counter()
+                    compressed = compress(content)
+                    self.add(totals, f'{encoding}+{compression}', len(compressed), rendered + time.perf_counter() - start)
+
+        pages = options['pages']
+        return {
+            key: value * 1000 / pages if key == 'build' else (value[0] / pages, value[1] * 1000 / pages)
+            for key, value in totals.items()
+        }
+
+    def add(self, totals, encoding, size, elapsed):
+        total_size, total_elapsed = totals.get(encoding, (0, 0.0))
+        totals[encoding] = (total_size + size, total_elapsed + elapsed)
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from ratings.models import Rating
+from ratings.search import FTS_TABLE
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text index over rating comments from the rating table, or verify "
+        "that it matches the comments stored there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only check the index against the stored comments; exit non-zero if they differ.",
+        )
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help="Also merge the index into a single b-tree after rebuilding, for faster searches.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The comment index is an SQLite FTS5 table.")
+        if options['verify']:
+            self.verify()
+        else:
+            self.rebuild(options['optimize'])
+
+    def command(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES (%s)', [name])
+
+    def rebuild(self, optimize):
+        with transaction.atomic():
+            self.command('rebuild')
+        if optimize:
+            self.command('optimize')
+        count = Rating.objects.exclude(comment__isnull=True).exclude(comment='').count()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the comment index over {count} commented ratings."))
+
+    def verify(self):
+        # with a rank of 1, FTS5 also checks the index against the content table
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+        except DatabaseError as e:
+            raise CommandError(f"The comment index is out of date ({e}). Run without --verify to rebuild.")
+        self.stdout.write(self.style.SUCCESS("The comment index matches the stored comments."))
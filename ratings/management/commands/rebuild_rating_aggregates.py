@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from ratings.models import Rating, RatingAggregate, STAR_FIELDS
+from ratings.versions import bump_stats_version
+
+AGGREGATE_FIELDS = ['rating_sum', 'rating_count'] + STAR_FIELDS
+
+
+# recompute (professor, module) totals straight from the rating table
+def compute_aggregates():
+    totals = Rating.objects.filter(professor__isnull=False).values('professor', 'module').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{field: Count('id', filter=Q(rating=star)) for star, field in enumerate(STAR_FIELDS, start=1)}
+    )
+    return {
+        (row['professor'], row['module']): tuple(row[field] for field in AGGREGATE_FIELDS)
+        for row in totals
+    }
+
+
+class Command(BaseCommand):
+    help = "Rebuild the RatingAggregate table from scratch, or verify it against the ratings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare stored aggregates with recomputed ones; exit non-zero on drift.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            self.verify()
+        else:
+            self.rebuild(options['batch_size'])
+
+    def rebuild(self, batch_size):
+        with transaction.atomic():
+            expected = compute_aggregates()
+            RatingAggregate.objects.all().delete()
+            # anything cached per stats version (summaries, leaderboards) was built from the old rows
+            transaction.on_commit(bump_stats_version)
+            RatingAggregate.objects.bulk_create(
+                [
+                    RatingAggregate(
+                        professor_id=professor_id,
+                        module_id=module_id,
+                        **dict(zip(AGGREGATE_FIELDS, values))
+                    )
+                    for (professor_id, module_id), values in expected.items()
+                ],
+                batch_size=batch_size
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(expected)} rating aggregates."))
+
+    def verify(self):
+        expected = compute_aggregates()
+        stored = {
+            (row[0], row[1]): tuple(row[2:])
+            for row in RatingAggregate.objects.filter(rating_count__gt=0).values_list(
+                'professor_id', 'module_id', *AGGREGATE_FIELDS
+            )
+        }
+
+        drifted = sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+        for professor_id, module_id in drifted:
+            self.stdout.write(
+                f"professor={professor_id} module={module_id}: "
+                f"stored={stored.get((professor_id, module_id))} expected={expected.get((professor_id, module_id))}"
+            )
+
+        if drifted:
+            raise CommandError(f"{len(drifted)} rating aggregates are out of date. Run without --verify to rebuild.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(expected)} rating aggregates are up to date."))
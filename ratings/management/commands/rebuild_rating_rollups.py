@@ -0,0 +1,85 @@
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from ratings.models import Rating, RatingRollup, bucket_start
+from ratings.versions import bump_stats_version
+
+
+# recompute every (professor, module, period, bucket) from the rating table: one grouped query
+# by day, with the weekly buckets summed up from the daily ones
+def compute_rollups():
+    daily = Rating.objects.filter(professor__isnull=False).annotate(day=TruncDate('date')).values(
+        'professor', 'module', 'day'
+    ).annotate(rating_sum=Sum('rating'), rating_count=Count('id')).order_by()
+
+    rollups = {}
+    for row in daily:
+        for period in RatingRollup.PERIODS:
+            key = (row['professor'], row['module'], period, bucket_start(row['day'], period))
+            totals = rollups.setdefault(key, Counter())
+            totals['rating_sum'] += row['rating_sum']
+            totals['rating_count'] += row['rating_count']
+    return {key: (totals['rating_sum'], totals['rating_count']) for key, totals in rollups.items()}
+
+
+class Command(BaseCommand):
+    help = "Backfill the daily/weekly RatingRollup table from scratch, or verify it against the ratings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare stored rollups with recomputed ones; exit non-zero on drift.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            self.verify()
+        else:
+            self.rebuild(options['batch_size'])
+
+    def rebuild(self, batch_size):
+        with transaction.atomic():
+            expected = compute_rollups()
+            RatingRollup.objects.all().delete()
+            # anything cached per stats version (summaries, leaderboards) was built from the old rows
+            transaction.on_commit(bump_stats_version)
+            RatingRollup.objects.bulk_create(
+                [
+                    RatingRollup(
+                        professor_id=professor_id,
+                        module_id=module_id,
+                        period=period,
+                        bucket=bucket,
+                        rating_sum=rating_sum,
+                        rating_count=rating_count
+                    )
+                    for (professor_id, module_id, period, bucket), (rating_sum, rating_count) in expected.items()
+                ],
+                batch_size=batch_size
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(expected)} rating rollups."))
+
+    def verify(self):
+        expected = compute_rollups()
+        stored = {
+            tuple(row[:4]): tuple(row[4:])
+            for row in RatingRollup.objects.filter(rating_count__gt=0).values_list(
+                'professor_id', 'module_id', 'period', 'bucket', 'rating_sum', 'rating_count'
+            )
+        }
+
+        drifted = sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+        for key in drifted:
+            professor_id, module_id, period, bucket = key
+            self.stdout.write(
+                f"professor={professor_id} module={module_id} {period}={bucket}: "
+                f"stored={stored.get(key)} expected={expected.get(key)}"
+            )
+
+        if drifted:
+            raise CommandError(f"{len(drifted)} rating rollups are out of date. Run without --verify to rebuild.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(expected)} rating rollups are up to date."))
@@ -0,0 +1,139 @@
+import json
+import random
+import re
+import requests
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from ratings.loadtest import run_load
+from ratings.models import RatingAggregate
+from ratings.seeding import SEED_PASSWORD
+
+# endpoint -> view name it is labelled with on /metrics
+ENDPOINTS = {
+    'list': 'list',
+    'view': 'view',
+    'average': 'average',
+    'rate': 'rate',
+    'login': 'login',
+}
+
+QUERY_TOTAL = re.compile(r'^profrates_db_queries_total\{view="([^"]*)"\} (\S+)$', re.MULTILINE)
+
+# fields compared against a previous baseline; True means higher is better
+COMPARED = {'throughput_rps': True, 'p50_ms': False, 'p95_ms': False, 'p99_ms': False, 'queries_per_request': False}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every main endpoint of a running server (e.g. `manage.py runserver --noreload` "
+        "with PROFRATES_THROTTLING=0, after `manage.py seed_ratings`) at several concurrency "
+        "levels and report throughput, latency percentiles and database queries per request, "
+        "optionally as a JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/')
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint per level.")
+        parser.add_argument('--prefix', default='seed', help="Prefix the benchmark users were seeded with.")
+        parser.add_argument('--password', default=SEED_PASSWORD)
+        parser.add_argument('--seed', type=int, default=3011, help="Random seed for the request mix.")
+        parser.add_argument('--output', '-o', help="Write the results as a JSON baseline to this file.")
+        parser.add_argument('--compare', help="Compare the results against a previous JSON baseline.")
+
+    def handle(self, *args, **options):
+        self.base_url = options['base_url'].rstrip('/') + '/'
+        rng = random.Random(options['seed'])
+
+        usernames = [*User.objects.filter(username__startswith=f"{options['prefix']}-user-")
+                     .order_by('id').values_list('username', flat=True)[:1000]]
+        pairs = [*RatingAggregate.objects.filter(rating_count__gt=0)
+                 .order_by('id').values_list('professor_id', 'module_id')[:1000]]
+        if not usernames or not pairs:
+            raise CommandError("No seeded users or rated pairs found; run seed_ratings first.")
+
+        token = self.login(usernames[0], options['password'])
+        builders = {
+            'list': lambda i: {'method': 'GET', 'url': self.url('api/list/')},
+            'view': lambda i: {'method': 'GET', 'url': self.url('api/view/'), 'params': self.pair_params(rng, pairs)},
+            'average': lambda i: {
+                'method': 'GET', 'url': self.url('api/average/'), 'params': self.pair_params(rng, pairs)
+            },
+            'rate': lambda i: {
+                'method': 'POST',
+                'url': self.url('api/rate/'),
+                'headers': {'Authorization': f'Bearer {token}'},
+                'json': {**self.pair_params(rng, pairs), 'rating': rng.randint(1, 5), 'comment': 'benchmark'},
+            },
+            'login': lambda i: {
+                'method': 'POST',
+                'url': self.url('api/login/'),
+                'json': {'username': rng.choice(usernames), 'password': options['password']},
+            },
+        }
+
+        results = []
+        for endpoint in options['endpoints']:
+            for concurrency in options['concurrency']:
+                before = self.query_totals()
+                stats = run_load(builders[endpoint], total=options['requests'], concurrency=concurrency)
+                queries = self.query_totals().get(ENDPOINTS[endpoint], 0) - before.get(ENDPOINTS[endpoint], 0)
+                stats['queries_per_request'] = round(queries / options['requests'], 2)
+                results.append({'endpoint': endpoint, 'concurrency': concurrency, **stats})
+                self.stdout.write(
+                    f"{endpoint:8} c={concurrency:<4} {stats['throughput_rps']:>8} req/s  "
+                    f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms  "
+                    f"queries/req={stats['queries_per_request']} errors={stats['errors']}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                json.dump({'base_url': self.base_url, 'requests': options['requests'], 'results': results}, out, indent=2)
+        if options['compare']:
+            self.compare(results, options['compare'])
+
+    def url(self, path):
+        return self.base_url + path
+
+    def pair_params(self, rng, pairs):
+        professor_id, module_id = rng.choice(pairs)
+        return {'professor': professor_id, 'module': module_id}
+
+    def login(self, username, password):
+        response = requests.post(self.url('api/login/'), json={'username': username, 'password': password})
+        if response.status_code != 200:
+            raise CommandError(f"Could not log in as {username}: HTTP {response.status_code}.")
+        return response.json()['access']
+
+    # database queries run so far, by view, as reported by the server's /metrics endpoint
+    def query_totals(self):
+        try:
+            response = requests.get(self.url('metrics'))
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise CommandError(f"Could not read {self.url('metrics')}: {e}")
+        return {view: float(value) for view, value in QUERY_TOTAL.findall(response.text)}
+
+    def compare(self, results, path):
+        try:
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)['results']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read baseline {path}: {e}")
+
+        previous = {(row['endpoint'], row['concurrency']): row for row in baseline}
+        self.stdout.write(f"\nCompared with {path}:")
+        for row in results:
+            old = previous.get((row['endpoint'], row['concurrency']))
+            if old is None:
+                continue
+            changes = []
+            for field, higher_is_better in COMPARED.items():
+                if not old.get(field) or row.get(field) is None:
+                    continue
+                change = (row[field] - old[field]) / old[field] * 100
+                better = change > 0 if higher_is_better else change < 0
+                text = f"{field} {old[field]} -> {row[field]} ({change:+.1f}%)"
+                changes.append(self.style.SUCCESS(text) if better else self.style.WARNING(text) if change else text)
+            self.stdout.write(f"{row['endpoint']:8} c={row['concurrency']:<4} " + ", ".join(changes))
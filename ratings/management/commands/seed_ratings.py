@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from ratings.seeding import SEED_PASSWORD, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, professors, modules, teaching assignments and ratings for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--professors', type=int, default=200)
+        parser.add_argument('--modules', type=int, default=400)
+        parser.add_argument('--ratings', type=int, default=100000)
+        parser.add_argument('--teachers-per-module', type=int, default=2)
+        parser.add_argument('--days', type=int, default=120, help="Spread rating dates over this many past days.")
+        parser.add_argument('--prefix', default='seed', help="Prefix for generated usernames and names.")
+        parser.add_argument('--seed', type=int, help="Random seed, for reproducible datasets.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default=SEED_PASSWORD, help="Password shared by every seeded user.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            seeded = seed_dataset(
+                users=options['users'],
+                professors=options['professors'],
+                modules=options['modules'],
+                ratings=options['ratings'],
+                teachers_per_module=options['teachers_per_module'],
+                days=options['days'],
+                prefix=options['prefix'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                password=options['password'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(seeded['users'])} users, {len(seeded['professors'])} professors, "
+            f"{len(seeded['modules'])} modules, {len(seeded['pairs'])} teaching assignments and "
+            f"{len(seeded['ratings'])} ratings in {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+from collections import Counter
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import override_settings
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+from ratings.models import Rating
+from ratings.seeding import request_host
+from ratings.teaching import teaching_pairs
+from ratings.writebehind import RATING_BUFFER
+
+
+class Command(BaseCommand):
+    help = (
+        "Post ratings to /api/rate/ from many threads at once, each with its own database "
+        "connection, and report how many writes succeeded, failed or were refused as busy. "
+        "Writes real ratings, so run it against a scratch database (e.g. after seed_ratings). "
+        "Exits non-zero if any write failed or the aggregates drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=50, help="Ratings posted by each thread.")
+        parser.add_argument('--seed', type=int, default=3011)
+        parser.add_argument(
+            '--write-behind',
+            action='store_true',
+            help="Queue the ratings for batched writes (WRITE_BEHIND_ENABLED) and wait for them to be written.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("stress_writers needs a file database; in-memory SQLite is per connection.")
+        user = User.objects.order_by('id').first()
+        pairs = sorted(teaching_pairs())
+        if user is None or not pairs:
+            raise CommandError("No users or teaching assignments found; run seed_ratings first.")
+
+        factory = APIRequestFactory(SERVER_NAME=request_host())
+        view = resolve('/api/rate/').func
+        statuses, lock = Counter(), threading.Lock()
+        before = Rating.objects.count()
+
+        def writer(index):
+            rng = random.Random(options['seed'] + index)
+            try:
+                for _ in range(options['writes']):
+                    professor_id, module_id = rng.choice(pairs)
+                    request = factory.post('/api/rate/', {
+                        'professor': professor_id,
+                        'module': module_id,
+                        'rating': rng.randint(1, 5),
+                        'comment': 'stress test',
+                    }, format='json')
+                    force_authenticate(request, user=user)
+                    try:
+                        code = view(request).status_code
+                    except Exception as e:
+                        code = type(e).__name__
+                    with lock:
+                        statuses[code] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(options['threads'])]
+        start = time.perf_counter()
+        # one user posting this fast is exactly what the rate throttle exists to stop
+        with override_settings(THROTTLING_ENABLED=False, WRITE_BEHIND_ENABLED=options['write_behind']):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        accepted = time.perf_counter() - start
+        if options['write_behind']:
+            # the time that counts is until the last queued rating is written
+            left = RATING_BUFFER.drain()
+            RATING_BUFFER.reopen()
+            if left:
+                raise CommandError(f"{left} queued ratings were still unwritten after draining.")
+        elapsed = time.perf_counter() - start
+
+        total = options['threads'] * options['writes']
+        created = Rating.objects.count() - before
+        self.stdout.write(
+            f"{total} writes from {options['threads']} threads in {elapsed:.1f}s "
+            f"({total / elapsed:.1f} writes/s); {created} ratings created"
+        )
+        if options['write_behind']:
+            self.stdout.write(f"    all accepted after {accepted:.1f}s")
+        for code, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+            self.stdout.write(f"    {code}: {count}")
+
+        call_command('rebuild_rating_aggregates', verify=True, stdout=self.stdout)
+        call_command('rebuild_rating_rollups', verify=True, stdout=self.stdout)
+        succeeded = statuses[202 if options['write_behind'] else 201]
+        if succeeded != total or created != total:
+            raise CommandError(f"{total - succeeded} of {total} writes did not succeed.")
+        self.stdout.write(self.style.SUCCESS("Every concurrent write succeeded."))
@@ -0,0 +1,36 @@
+import sqlite3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into every replica file from PROFRATES_REPLICAS, "
+        "using SQLite's online backup, so local replica stand-ins can be refreshed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', action='append', choices=settings.DATABASE_REPLICAS or None,
+                            help="Only refresh this replica alias (repeatable).")
+
+    def handle(self, *args, **options):
+        aliases = options['replica'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError("No replicas configured; set PROFRATES_REPLICAS to a list of SQLite files.")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite' or any(connections[alias].vendor != 'sqlite' for alias in aliases):
+            raise CommandError("sync_replicas copies SQLite files; real replicas are kept in sync by the database.")
+
+        primary.ensure_connection()
+        for alias in aliases:
+            # drop this process's handle first, so the file is replaced underneath nothing
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"Copied {primary.settings_dict['NAME']} to {alias} ({connections[alias].settings_dict['NAME']}).")
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(aliases)} replicas."))
@@ -0,0 +1,212 @@
+"""
+Per-endpoint request metrics, exposed in the Prometheus text format.
+
+MetricsMiddleware times every request and counts the database queries it runs through an
+execute wrapper installed on each connection, labelled by the resolved view name. Samples
+are kept in memory per process, so scrape each worker (or run one worker per target).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels):
+        self.name, self.documentation, self.labels = name, documentation, labels
+        self.samples = {}
+
+    def inc(self, labels, amount=1):
+        self.samples[labels] = self.samples.get(labels, 0) + amount
+
+    def render(self):
+        for labels, value in sorted(self.samples.items()):
+            yield f"{self.name}{format_labels(self.labels, labels)} {format_value(value)}"
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name, self.documentation, self.labels, self.buckets = name, documentation, labels, buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self.samples = {}
+
+    def observe(self, labels, value):
+        sample = self.samples.get(labels)
+        if sample is None:
+            sample = self.samples[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+        sample[0][bisect_left(self.buckets, value)] += 1
+        sample[1] += value
+        sample[2] += 1
+
+    def render(self):
+        for labels, (counts, total, count) in sorted(self.samples.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, '+Inf'), counts):
+                cumulative += n
+                le = format_value(float(bound)) if bound != '+Inf' else bound
+                yield f"{self.name}_bucket{format_labels(self.labels, labels, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {format_value(total)}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {count}"
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+REQUEST_LABELS = ('view', 'method', 'status')
+VIEW_LABELS = ('view',)
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'profrates_http_request_duration_seconds', "Time spent handling a request.", REQUEST_LABELS, LATENCY_BUCKETS
+))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    'profrates_http_response_size_bytes', "Size of response bodies.", VIEW_LABELS, SIZE_BUCKETS
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    'profrates_db_queries_per_request', "Database queries run by a single request.", VIEW_LABELS, QUERY_COUNT_BUCKETS
+))
+QUERY_TOTAL = REGISTRY.register(Counter(
+    'profrates_db_queries_total', "Database queries run, by view.", VIEW_LABELS
+))
+QUERY_SECONDS = REGISTRY.register(Counter(
+    'profrates_db_query_duration_seconds_total', "Time spent in database queries, by view.", VIEW_LABELS
+))
+
+# the tracker for the request being handled; context variables follow the request into the
+# threads the async ORM runs queries on, which a per-connection wrapper alone would miss
+CURRENT_TRACKER = ContextVar('profrates_query_tracker', default=None)
+
+class QueryTracker:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# installed once on every database connection (see track_connection), and a no-op
+# outside a tracked request
+def track_query(execute, sql, params, many, context):
+    tracker = CURRENT_TRACKER.get()
+    if tracker is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        tracker.count += 1
+        tracker.seconds += time.perf_counter() - start
+
+@receiver(connection_created)
+def track_connection(sender, connection, **kwargs):
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
+
+def record(request, status, seconds, tracker, size):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match is not None else 'unresolved'
+    with REGISTRY.lock:
+        REQUEST_DURATION.observe((view, request.method, str(status)), seconds)
+        REQUEST_QUERIES.observe((view,), tracker.count)
+        QUERY_TOTAL.inc((view,), tracker.count)
+        QUERY_SECONDS.inc((view,), tracker.seconds)
+        if size is not None:
+            RESPONSE_SIZE.observe((view,), size)
+
+# works in both sync (WSGI) and async (ASGI) stacks, so async views stay off threads
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # connections opened before this module was imported never saw connection_created
+        for connection in connections.all(initialized_only=True):
+            track_connection(None, connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        tracker, start = QueryTracker(), time.perf_counter()
+        token = CURRENT_TRACKER.set(tracker)
+        try:
+            response = self.get_response(request)
+        finally:
+            CURRENT_TRACKER.reset(token)
+        return self.finish(request, response, tracker, start)
+
+    async def __acall__(self, request):
+        tracker, start = QueryTracker(), time.perf_counter()
+        token = CURRENT_TRACKER.set(tracker)
+        try:
+            response = await self.get_response(request)
+        finally:
+            CURRENT_TRACKER.reset(token)
+        return self.finish(request, response, tracker, start)
+
+    def finish(self, request, response, tracker, start):
+        if not response.streaming:
+            record(request, response.status_code, time.perf_counter() - start, tracker, len(response.content))
+        elif not response.is_async:
+            # streamed bodies run their queries while being sent, so measure them when they end
+            response.streaming_content = self.tracked_stream(
+                request, response.status_code, response.streaming_content, tracker, start
+            )
+        else:
+            record(request, response.status_code, time.perf_counter() - start, tracker, None)
+        return response
+
+    def tracked_stream(self, request, status, content, tracker, start):
+        chunks, size = iter(content), 0
+        try:
+            while True:
+                token = CURRENT_TRACKER.set(tracker)
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    CURRENT_TRACKER.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            record(request, status, time.perf_counter() - start, tracker, size)
+
+# Prometheus scrape endpoint - metrics
+def metrics_view(request):
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
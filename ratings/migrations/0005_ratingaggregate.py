@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_aggregates(apps, schema_editor):
+    Rating = apps.get_model('ratings', 'Rating')
+    RatingAggregate = apps.get_model('ratings', 'RatingAggregate')
+    totals = Rating.objects.filter(professor__isnull=False).values('professor', 'module').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{f'stars_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)}
+    )
+    RatingAggregate.objects.bulk_create(
+        [
+            RatingAggregate(
+                professor_id=row.pop('professor'),
+                module_id=row.pop('module'),
+                **row
+            )
+            for row in totals
+        ],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0004_remove_rating_professor_rating_professor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ratings.module')),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ratings.professor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('professor', 'module'), name='unique_rating_aggregate')],
+            },
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
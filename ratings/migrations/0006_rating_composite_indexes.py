@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0005_ratingaggregate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['date', 'id'], name='rating_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['professor', 'module', 'date'], name='rating_prof_module_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['module', 'date'], name='rating_module_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['user', 'date'], name='rating_user_date_idx'),
+        ),
+        # RegisterView looks users up by email, which auth.User does not index
+        migrations.RunSQL(
+            'CREATE INDEX ratings_user_email_idx ON auth_user (email)',
+            'DROP INDEX ratings_user_email_idx',
+        ),
+    ]
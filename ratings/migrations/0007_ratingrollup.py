@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0006_rating_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('bucket', models.DateField()),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ratings.module')),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ratings.professor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['module', 'period', 'bucket'], name='rollup_module_bucket_idx'), models.Index(fields=['period', 'bucket'], name='rollup_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('professor', 'module', 'period', 'bucket'), name='unique_rating_rollup')],
+            },
+        ),
+    ]
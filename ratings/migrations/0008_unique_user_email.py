@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+# the unique index cannot be built over duplicates, so name them instead of failing opaquely
+def check_duplicate_emails(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    duplicates = [
+        row['email'] for row in
+        User.objects.exclude(email='').values('email').annotate(n=Count('id')).filter(n__gt=1)[:10]
+    ]
+    if duplicates:
+        raise RuntimeError(
+            "Several accounts share these emails, resolve them before migrating: " + ", ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0007_ratingrollup'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # registration relies on this index to reject a taken email in the same insert; accounts
+        # created without an email (e.g. by createsuperuser) are left out of it
+        migrations.RunSQL(
+            'DROP INDEX ratings_user_email_idx',
+            'CREATE INDEX ratings_user_email_idx ON auth_user (email)',
+        ),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX ratings_user_email_uniq ON auth_user (email) WHERE email <> ''",
+            'DROP INDEX ratings_user_email_uniq',
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0008_unique_user_email'),
+    ]
+
+    operations = [
+        # an external-content FTS5 index over rating comments: the text stays in ratings_rating
+        # and the index maps its words to rating ids. triggers keep it in step with every write,
+        # including bulk_create and queryset updates, which send no signals
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE ratings_rating_fts USING fts5("
+            "comment, content='ratings_rating', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+            'DROP TABLE ratings_rating_fts',
+        ),
+        migrations.RunSQL(
+            'CREATE TRIGGER ratings_rating_fts_insert AFTER INSERT ON ratings_rating BEGIN '
+            'INSERT INTO ratings_rating_fts (rowid, comment) VALUES (new.id, new.comment); '
+            'END',
+            'DROP TRIGGER ratings_rating_fts_insert',
+        ),
+        migrations.RunSQL(
+            'CREATE TRIGGER ratings_rating_fts_delete AFTER DELETE ON ratings_rating BEGIN '
+            "INSERT INTO ratings_rating_fts (ratings_rating_fts, rowid, comment) VALUES ('delete', old.id, old.comment); "
+            'END',
+            'DROP TRIGGER ratings_rating_fts_delete',
+        ),
+        migrations.RunSQL(
+            'CREATE TRIGGER ratings_rating_fts_update AFTER UPDATE OF comment ON ratings_rating BEGIN '
+            "INSERT INTO ratings_rating_fts (ratings_rating_fts, rowid, comment) VALUES ('delete', old.id, old.comment); "
+            'INSERT INTO ratings_rating_fts (rowid, comment) VALUES (new.id, new.comment); '
+            'END',
+            'DROP TRIGGER ratings_rating_fts_update',
+        ),
+        # index the comments already there
+        migrations.RunSQL(
+            "INSERT INTO ratings_rating_fts (ratings_rating_fts) VALUES ('rebuild')",
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,5 +1,11 @@
-from django.db import models
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.db import connections, models, transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator, ValidationError
+from .teaching import teaches
+from .versions import bump_stats_version
 
 class Professor(models.Model):
     name = models.CharField(max_length=100)
@@ -29,13 +35,198 @@ class Rating(models.Model):
     comment = models.TextField(blank=True, null=True)
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # matched to the access patterns: keyset paging by (date, id), professor/module
+        # filters with date ordering, and per-user history
+        indexes = [
+            models.Index(fields=['date', 'id'], name='rating_date_id_idx'),
+            models.Index(fields=['professor', 'module', 'date'], name='rating_prof_module_date_idx'),
+            models.Index(fields=['module', 'date'], name='rating_module_date_idx'),
+            models.Index(fields=['user', 'date'], name='rating_user_date_idx'),
+        ]
+
     def clean(self):
-        if not self.module.professor.filter(id=self.professor.id).exists():
+        if not teaches(self.professor_id, self.module_id):
             raise ValidationError(f"{self.professor.name} does not teach {self.module.name}")
 
     def save(self, *args, **kwargs):
         self.clean()  # 🔥 Enforce validation before saving
-        super().save(*args, **kwargs)
+        # keep the aggregates and rollups in step with this row inside the same transaction
+        with transaction.atomic():
+            deltas = Counter()
+            if not self._state.adding and self.pk is not None:
+                previous = Rating.objects.filter(pk=self.pk).values_list('professor_id', 'module_id', 'rating', 'date').first()
+                if previous is not None:
+                    deltas[rating_key(*previous)] -= 1
+            super().save(*args, **kwargs)
+            deltas[rating_key(self.professor_id, self.module_id, self.rating, self.date)] += 1
+            apply_rating_deltas(deltas)
         
     def __str__(self):
-        return f"Rating: {self.rating} - {self.professor.name} in {self.module.name}"
\ No newline at end of file
+        return f"Rating: {self.rating} - {self.professor.name} in {self.module.name}"
+
+STAR_FIELDS = ['stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5']
+
+# every derived table is fed Counters of {rating_key(...): +/- n}
+def rating_key(professor_id, module_id, rating, date):
+    return (professor_id, module_id, rating, timezone.localdate(date))
+
+# add increments to the row matching keys, creating it when missing (and allowed)
+def increment_row(manager, keys, increments, create):
+    row = manager.filter(**keys)
+    changes = {field: F(field) + n for field, n in increments.items() if n}
+    if not changes or row.update(**changes) or not create:
+        return
+    try:
+        with transaction.atomic():
+            manager.create(**keys, **increments)
+    except IntegrityError:
+        # another writer created the row first, so fold our deltas into theirs
+        row.update(**changes)
+
+# add {key: increments} to many rows, creating a row only when it gains ratings. rows that can
+# only grow go through one INSERT ... ON CONFLICT DO UPDATE per batch, which inserts missing rows
+# and adds to existing ones in the same statement; the rest (deletions, a rating changing its
+# stars) can take counts below zero, which an INSERT would refuse, so they are updated one by one
+def increment_rows(manager, key_fields, rows):
+    connection = connections[manager.db]
+    can_upsert = connection.features.supports_update_conflicts_with_target
+    upserts = {}
+    for key, increments in rows.items():
+        if can_upsert and all(n >= 0 for n in increments.values()):
+            if increments['rating_count'] > 0:
+                upserts[key] = increments
+        else:
+            increment_row(manager, dict(zip(key_fields, key)), increments, create=increments['rating_count'] > 0)
+    if upserts:
+        upsert_increments(manager, connection, key_fields, upserts)
+
+def upsert_increments(manager, connection, key_fields, rows):
+    opts = manager.model._meta
+    # every column goes into the INSERT, as bulk_create would write it, but only the
+    # incremented ones are added to on conflict
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    increment_fields = {name for increments in rows.values() for name in increments}
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    columns = ', '.join(quote(field.column) for field in fields)
+    conflict = ', '.join(quote(opts.get_field(name).column) for name in key_fields)
+    updates = ', '.join(
+        f'{quote(field.column)} = {table}.{quote(field.column)} + excluded.{quote(field.column)}'
+        for field in fields if field.attname in increment_fields
+    )
+
+    # sorted, so concurrent writers meet the rows in the same order
+    objs = [manager.model(**dict(zip(key_fields, key)), **increments) for key, increments in sorted(rows.items())]
+    batch_size = connection.ops.bulk_batch_size(fields, objs)
+    row_placeholder = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) VALUES {", ".join([row_placeholder] * len(batch))} '
+                f'ON CONFLICT ({conflict}) DO UPDATE SET {updates}',
+                [field.get_db_prep_save(getattr(obj, field.attname), connection) for obj in batch for field in fields],
+            )
+
+# apply one batch of rating changes to every derived table
+def apply_rating_deltas(deltas):
+    deltas = {key: n for key, n in deltas.items() if n and key[0] is not None}
+    if not deltas:
+        return
+    RatingAggregate.objects.apply_deltas(deltas)
+    RatingRollup.objects.apply_deltas(deltas)
+    transaction.on_commit(bump_stats_version)
+
+# count ratings that were written or deleted without going through Rating.save (bulk_create, deletes)
+def record_ratings(ratings, sign=1):
+    counts = Counter(rating_key(r.professor_id, r.module_id, r.rating, r.date) for r in ratings)
+    apply_rating_deltas({key: sign * n for key, n in counts.items()})
+
+class RatingAggregateManager(models.Manager):
+    # one row per (professor, module), created the first time a pair is rated
+    def apply_deltas(self, deltas):
+        pairs = defaultdict(Counter)
+        for (professor_id, module_id, stars, _), n in deltas.items():
+            pairs[(professor_id, module_id)][stars] += n
+
+        increment_rows(self, ('professor_id', 'module_id'), {
+            pair: {
+                'rating_sum': sum(star * n for star, n in stars.items()),
+                'rating_count': sum(stars.values()),
+                **{f'stars_{star}': n for star, n in stars.items()}
+            }
+            for pair, stars in pairs.items()
+        })
+
+# running totals per (professor, module), maintained alongside every Rating write
+class RatingAggregate(models.Model):
+    professor = models.ForeignKey(Professor, on_delete=models.CASCADE)
+    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    objects = RatingAggregateManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['professor', 'module'], name='unique_rating_aggregate')
+        ]
+
+    @property
+    def average(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    def __str__(self):
+        return f"{self.professor.name} in {self.module.name}: {self.rating_count} ratings"
+
+# the start of the day/week a rating date falls in; weeks start on Monday
+def bucket_start(day, period):
+    return day - timedelta(days=day.weekday()) if period == RatingRollup.WEEK else day
+
+class RatingRollupManager(models.Manager):
+    # one row per (professor, module, period, bucket)
+    def apply_deltas(self, deltas):
+        buckets = defaultdict(Counter)
+        for (professor_id, module_id, stars, day), n in deltas.items():
+            for period in RatingRollup.PERIODS:
+                key = (professor_id, module_id, period, bucket_start(day, period))
+                buckets[key]['rating_sum'] += stars * n
+                buckets[key]['rating_count'] += n
+
+        increment_rows(self, ('professor_id', 'module_id', 'period', 'bucket'), {
+            key: {'rating_sum': totals['rating_sum'], 'rating_count': totals['rating_count']}
+            for key, totals in buckets.items()
+        })
+
+# ratings per (professor, module) per day and per week, for trend charts
+class RatingRollup(models.Model):
+    DAY = 'day'
+    WEEK = 'week'
+    PERIODS = [DAY, WEEK]
+
+    professor = models.ForeignKey(Professor, on_delete=models.CASCADE)
+    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    period = models.CharField(max_length=4, choices=[(DAY, 'Day'), (WEEK, 'Week')])
+    bucket = models.DateField()
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    objects = RatingRollupManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['professor', 'module', 'period', 'bucket'], name='unique_rating_rollup')
+        ]
+        indexes = [
+            models.Index(fields=['module', 'period', 'bucket'], name='rollup_module_bucket_idx'),
+            models.Index(fields=['period', 'bucket'], name='rollup_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.professor.name} in {self.module.name}, {self.period} of {self.bucket}: {self.rating_count} ratings"
@@ -0,0 +1,87 @@
+import base64
+import binascii
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.urls import replace_query_param
+from .filters import parse_int
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# cursors are an opaque, url-safe encoding of the last (date, id) seen
+def encode_cursor(date, pk):
+    raw = f"{date.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError("Invalid cursor.")
+    if date is None:
+        raise ValidationError("Invalid cursor.")
+    return date, pk
+
+# keyset pagination over (date, id): every page is a single indexed range scan,
+# no matter how deep into the table the client has walked
+class KeysetPaginator:
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    # takes a DRF request or a plain Django one (the async views have no query_params)
+    def __init__(self, request):
+        self.request = request
+        params = getattr(request, 'query_params', request.GET)
+        self.page_size = parse_int(
+            params, self.page_size_query_param, minimum=1, maximum=MAX_PAGE_SIZE
+        ) or DEFAULT_PAGE_SIZE
+        cursor = params.get(self.cursor_query_param)
+        self.position = self.decode_position(cursor) if cursor else None
+        self.next_position = None
+
+    # how a page's last row becomes the next cursor; subclasses paging on other keys override these
+    def row_position(self, row):
+        return (row.date, row.id)
+
+    def encode_position(self, position):
+        return encode_cursor(*position)
+
+    def decode_position(self, cursor):
+        return decode_cursor(cursor)
+
+    def page_queryset(self, queryset):
+        queryset = queryset.order_by('date', 'id')
+        if self.position is not None:
+            date, pk = self.position
+            queryset = queryset.filter(Q(date__gt=date) | Q(date=date, id__gt=pk))
+        # fetch one extra row to find out whether another page exists
+        return queryset[:self.page_size + 1]
+
+    def paginate(self, queryset):
+        return self.finish_page(list(self.page_queryset(queryset)))
+
+    async def apaginate(self, queryset):
+        return self.finish_page([row async for row in self.page_queryset(queryset)])
+
+    def finish_page(self, rows):
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_position = self.row_position(rows[-1])
+        return rows
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_position(self.next_position))
+
+    def get_paginated_response_data(self, results):
+        return {
+            "next": self.get_next_link(),
+            "page_size": self.page_size,
+            "results": results,
+        }
@@ -0,0 +1,62 @@
+"""
+The model-instance /view/ path that ratings.fastpath stands in for.
+
+No view serves it any more: it builds each row from Rating instances fetched with
+select_related(), the way /view/ did before the fast path, and is kept as the reference the
+fast path must reproduce byte for byte (`manage.py check_fast_serializers`) and as the
+baseline `manage.py benchmark_serializers` times it against.
+"""
+from .models import Rating
+from .views import ROW_FIELDS
+
+# a rating's professor is nullable; such rows carry "professor": null
+def professor_entry(professor):
+    if professor is None:
+        return None
+    return {"id": professor.id, "name": professor.name}
+
+def module_entry(module):
+    return {"id": module.id, "name": module.name, "year": module.year, "semester": module.semester}
+
+# how each /view/ row field is read off a rating
+ROW_VALUES = {
+    'professor': lambda rating: professor_entry(rating.professor),
+    'module': lambda rating: module_entry(rating.module),
+    'rating': lambda rating: rating.rating,
+    'comment': lambda rating: rating.comment,
+    'date': lambda rating: rating.date.isoformat(),
+}
+# ?shape=normalized rows reference professors and modules by id; each one is sent once, beside the rows
+NORMALIZED_VALUES = {
+    **ROW_VALUES,
+    'professor': lambda rating: rating.professor_id,
+    'module': lambda rating: rating.module_id,
+}
+RELATED_FIELDS = {'professor': ('professors', professor_entry), 'module': ('modules', module_entry)}
+
+# one /view/ row, from a rating fetched with the relations it names
+def rating_row(rating, fields=ROW_FIELDS, values=ROW_VALUES):
+    return {field: values[field](rating) for field in fields}
+
+# the ratings to list, loading only the columns and relations the requested fields need
+def view_queryset(fields):
+    relations = [field for field in RELATED_FIELDS if field in fields]
+    columns = [field for field in fields if field not in RELATED_FIELDS]
+    queryset = Rating.objects.only('id', 'date', *columns, *relations)
+    # select_related() with no arguments would follow every foreign key instead of none
+    return queryset.select_related(*relations) if relations else queryset
+
+# a page of /view/ data; normalized pages carry the professors and modules their rows reference,
+# leaving out the missing professor of a rating that has none
+def view_page_data(paginator, ratings, fields, normalized):
+    if not normalized:
+        return paginator.get_paginated_response_data([rating_row(rating, fields) for rating in ratings])
+
+    data = paginator.get_paginated_response_data(
+        [rating_row(rating, fields, NORMALIZED_VALUES) for rating in ratings]
+    )
+    for field, (key, entry) in RELATED_FIELDS.items():
+        if field in fields:
+            related = (getattr(rating, field) for rating in ratings)
+            data[key] = {str(obj.id): entry(obj) for obj in related if obj is not None}
+    return data
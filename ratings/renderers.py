@@ -0,0 +1,64 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+# msgpack is optional; without it the views simply do not offer the format
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# orjson is optional; without it FastJSONRenderer is plain JSONRenderer
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# JSONRenderer, encoding with orjson when it is installed. Strings, integers, booleans and
+# datetimes come out as the same bytes as JSONRenderer's, but floats do not: orjson writes
+# 1e-05 as 0.00001 and 1e+16 as 1e16, and NaN and infinities as null where JSONRenderer
+# raises. So it only renders /list/ and /view/, whose data holds no floats and which
+# check_fast_serializers compares byte for byte; everything else keeps JSONRenderer
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # datetimes go to the DRF encoder, which formats them differently from orjson
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # as JSONRenderer does: U+2028 and U+2029 are valid JSON but not valid JavaScript
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+# MessagePack, for clients that would rather not parse JSON; same data as the JSON renderer
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True)
+
+
+# the default renderers with JSONRenderer swapped for FastJSONRenderer, for /list/ and /view/
+FAST_RENDERERS = [
+    FastJSONRenderer if renderer is JSONRenderer else renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+]
+
+# renderers the listing views offer on top of REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+OPTIONAL_RENDERERS = [MessagePackRenderer] if msgpack is not None else []
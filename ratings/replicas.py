@@ -0,0 +1,86 @@
+"""
+Read/write splitting across the primary database and its read replicas.
+
+ReplicaRouter sends writes to the primary and reads to a random replica from
+settings.DATABASE_REPLICAS. A client that has just written is pinned to the primary for
+settings.REPLICA_PIN_SECONDS (by a cookie set in ReadYourWritesMiddleware), so it never reads
+back a replica that has not caught up with its own rating yet.
+
+Anything cached under a version token is filled from the primary: the token moves on every
+write, and a lagging replica would otherwise cache pre-write data under the new version.
+"""
+import random
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'profrates_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# true while the current request must read from the primary
+PINNED = ContextVar('profrates_pinned_to_primary', default=False)
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # related lookups (e.g. prefetches) stay on the database their instance came from
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        # reads inside a write transaction must see that transaction's own rows
+        if PINNED.get() or not replicas() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    # replicas are copies of the primary, never migrated on their own
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+# pins a request to the primary when it writes (so its own validation reads are current) or
+# when the client wrote within the last REPLICA_PIN_SECONDS; works under WSGI and ASGI
+class ReadYourWritesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = PINNED.set(self.pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            PINNED.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = PINNED.set(self.pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            PINNED.reset(token)
+        return self.finish(request, response)
+
+    def pinned(self, request):
+        return request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+
+    def finish(self, request, response):
+        if replicas() and request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10), httponly=True, samesite='Lax'
+            )
+        return response
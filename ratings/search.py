@@ -0,0 +1,134 @@
+"""
+Full-text search over rating comments, backed by the ratings_rating_fts FTS5 index.
+
+The index is external-content: it holds no copy of the comments, only their words, and triggers
+on ratings_rating keep it current (see migration 0009). Results are ranked by bm25 and paged by
+(rank, id) cursor. Ranks shift as ratings are added, so a client paging through a search while
+it changes may see a result twice or miss one, as with any ranked listing.
+"""
+import base64
+import binascii
+import re
+from collections import namedtuple
+from django.core.exceptions import ValidationError
+from django.db import connections, router
+from .fastpath import FAST_ROW_VALUES
+from .filters import parse_int, parse_moment
+from .models import Module, Professor, Rating
+from .pagination import KeysetPaginator
+
+FTS_TABLE = 'ratings_rating_fts'
+MAX_QUERY_TERMS = 10
+
+# words, optionally ending in * to match as a prefix; everything else in the query is ignored
+SEARCH_TERM = re.compile(r'(\w+)(\*?)')
+
+# turn what a user typed into an FTS5 query matching every word, without exposing FTS5 syntax
+def parse_search_query(params, name='q'):
+    terms = SEARCH_TERM.findall(params.get(name) or '')
+    if not terms:
+        raise ValidationError(f"Please provide some words to search for with {name}.")
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValidationError(f"{name} may contain at most {MAX_QUERY_TERMS} words.")
+    return ' '.join(f'"{word}"{prefix}' for word, prefix in terms)
+
+# the same filters as /view/, as SQL conditions on the joined rating (r)
+def search_conditions(params, connection):
+    professor_id = parse_int(params, 'professor')
+    module_id = parse_int(params, 'module')
+    since = parse_moment(params, 'since')
+    until = parse_moment(params, 'until', end_of_day=True)
+    min_rating = parse_int(params, 'min_rating', minimum=1, maximum=5)
+
+    conditions = []
+    if professor_id is not None:
+        conditions.append(('r.professor_id = %s', [professor_id]))
+    if module_id is not None:
+        conditions.append(('r.module_id = %s', [module_id]))
+    if since is not None:
+        conditions.append(('r.date >= %s', [connection.ops.adapt_datetimefield_value(since)]))
+    if until is not None:
+        conditions.append(('r.date <= %s', [connection.ops.adapt_datetimefield_value(until)]))
+    if min_rating is not None:
+        conditions.append(('r.rating >= %s', [min_rating]))
+    return conditions
+
+# rows carry the same attribute names as fast-path /view/ rows, so they are built the same way
+SEARCH_SQL = f"""
+    SELECT r.id AS id, r.date AS date, r.rating AS rating, r.comment AS comment,
+           r.professor_id AS professor_id, p.name AS professor__name,
+           r.module_id AS module_id, m.name AS module__name, m.year AS module__year, m.semester AS module__semester,
+           hits.rank AS rank
+    FROM (
+        SELECT rowid AS id, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s {{hits_where}} {{hits_limit}}
+    ) AS hits
+    JOIN {Rating._meta.db_table} AS r ON r.id = hits.id
+    LEFT JOIN {Professor._meta.db_table} AS p ON p.id = r.professor_id
+    JOIN {Module._meta.db_table} AS m ON m.id = r.module_id
+    {{where}}
+    ORDER BY hits.rank, hits.id
+    LIMIT %s
+"""
+
+# one page of matching ratings, best first, starting after the (rank, id) position
+def search_ratings(query, params, position=None, limit=50):
+    connection = connections[router.db_for_read(Rating)]
+    conditions = search_conditions(params, connection)
+    hits_conditions = []
+    if position is not None:
+        rank, pk = position
+        hits_conditions.append(('(rank > %s OR (rank = %s AND rowid > %s))', [rank, rank, pk]))
+
+    # every match has to be ranked either way, but without rating filters the page can be cut
+    # down before the joins instead of after them
+    hits_limit = not conditions
+    sql = SEARCH_SQL.format(
+        hits_where=''.join(f' AND {condition}' for condition, _ in hits_conditions),
+        hits_limit='ORDER BY rank, rowid LIMIT %s' if hits_limit else '',
+        where='WHERE ' + ' AND '.join(condition for condition, _ in conditions) if conditions else '',
+    )
+    arguments = [
+        query,
+        *(value for _, values in hits_conditions for value in values),
+        *([limit] if hits_limit else []),
+        *(value for _, values in conditions for value in values),
+        limit,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, arguments)
+        Row = namedtuple('Row', [column[0] for column in cursor.description])
+        rows = [Row(*row) for row in cursor.fetchall()]
+
+    # raw rows come back as the backend stores them; convert the dates as the ORM would
+    date = Rating._meta.get_field('date').get_col(Rating._meta.db_table)
+    for converter in connection.ops.get_db_converters(date):
+        rows = [row._replace(date=converter(row.date, date, connection)) for row in rows]
+    return rows
+
+def search_row(row):
+    return {
+        **{field: values(row) for field, values in FAST_ROW_VALUES.items()},
+        # bm25 is lower for better matches; sent as a score where higher is better
+        "score": -row.rank,
+    }
+
+# pages ranked results by (rank, id) rather than (date, id)
+class SearchPaginator(KeysetPaginator):
+    def row_position(self, row):
+        return (row.rank, row.id)
+
+    def encode_position(self, position):
+        rank, pk = position
+        return base64.urlsafe_b64encode(f"{rank!r}|{pk}".encode()).decode().rstrip('=')
+
+    def decode_position(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            rank, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+            return float(rank), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValidationError("Invalid cursor.")
+
+    def paginate(self, query, params):
+        # fetch one extra row to find out whether another page exists
+        return self.finish_page(search_ratings(query, params, self.position, self.page_size + 1))
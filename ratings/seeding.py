@@ -0,0 +1,111 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Professor, Module, Rating, record_ratings
+from .teaching import invalidate_teaching_pairs
+from .versions import bump_catalogue_version, bump_stats_version
+
+SEED_PASSWORD = 'bench-password'
+
+# generate a synthetic dataset with bulk_create; every seeded user shares one password hash,
+# so seeding stays fast and the benchmarks can log in as any of them
+def seed_dataset(users, professors, modules, ratings, teachers_per_module=2, days=120,
+                 prefix='seed', seed=None, batch_size=1000, password=SEED_PASSWORD):
+    rng = random.Random(seed)
+    start = User.objects.filter(username__startswith=f'{prefix}-user-').count()
+    password_hash = make_password(password) if password else '!'
+    new_users = User.objects.bulk_create(
+        [
+            User(username=f'{prefix}-user-{i}', email=f'{prefix}-user-{i}@example.com', password=password_hash)
+            for i in range(start, start + users)
+        ],
+        batch_size=batch_size
+    )
+    new_professors = Professor.objects.bulk_create(
+        [Professor(name=f'Professor {prefix}-{i}') for i in range(professors)], batch_size=batch_size
+    )
+    new_modules = Module.objects.bulk_create(
+        [
+            Module(name=f'Module {prefix}-{i}', year=2020 + i % 6, semester=1 + i % 2)
+            for i in range(modules)
+        ],
+        batch_size=batch_size
+    )
+
+    Teaching = Module.professor.through
+    pairs = sorted({
+        (professor.id, module.id)
+        for module in new_modules
+        for professor in rng.sample(new_professors, min(teachers_per_module, len(new_professors)))
+    })
+    Teaching.objects.bulk_create(
+        [Teaching(professor_id=p, module_id=m) for p, m in pairs], batch_size=batch_size
+    )
+    # bulk_create sends no m2m or save signals, so drop the caches by hand
+    invalidate_teaching_pairs()
+    bump_catalogue_version()
+
+    new_ratings = []
+    if pairs and new_users:
+        new_ratings = Rating.objects.bulk_create(
+            [
+                Rating(
+                    user=rng.choice(new_users),
+                    professor_id=professor_id,
+                    module_id=module_id,
+                    rating=rng.randint(1, 5),
+                    comment=rng.choice(['', 'Great lectures.', 'Hard exams.', 'Clear notes.', None])
+                )
+                for professor_id, module_id in (rng.choice(pairs) for _ in range(ratings))
+            ],
+            batch_size=batch_size
+        )
+        # date is auto_now_add, so spread the ratings over the last few days afterwards; one
+        # executemany is far cheaper than bulk_update's CASE expression for every row
+        if days:
+            now = timezone.now()
+            for rating in new_ratings:
+                rating.date = now - timedelta(seconds=rng.randrange(days * 86400))
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'UPDATE {Rating._meta.db_table} SET date = %s WHERE id = %s',
+                    [(connection.ops.adapt_datetimefield_value(r.date), r.id) for r in new_ratings]
+                )
+        record_ratings(new_ratings)
+
+    return {
+        'users': new_users,
+        'professors': new_professors,
+        'modules': new_modules,
+        'pairs': pairs,
+        'ratings': new_ratings,
+    }
+
+class RollBack(Exception):
+    pass
+
+# seed_dataset(**seed_kwargs) inside a transaction that is always rolled back, for the check and
+# benchmark commands; yields what seed_dataset returned
+@contextmanager
+def throwaway_dataset(**seed_kwargs):
+    try:
+        with transaction.atomic():
+            yield seed_dataset(**seed_kwargs)
+            raise RollBack
+    except RollBack:
+        pass
+    finally:
+        # the seeded rows are gone, so nothing cached while they existed may survive; the
+        # on_commit stats bump never ran, since nothing was committed
+        invalidate_teaching_pairs()
+        bump_catalogue_version()
+        bump_stats_version()
+
+# a host for requests built in-process (APIRequestFactory, the test client) that ALLOWED_HOSTS accepts
+def request_host():
+    return next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Professor, Module, Rating
+from .writebehind import RATING_BUFFER
 
 class ModuleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,11 +31,27 @@ class RatingSerializer(serializers.ModelSerializer):
         fields = ['rating', 'professor', 'module', 'comment']
 
     
-    # set user to rating from request
-    def create(self, data):
+    # the user the rating is from, who must be logged in
+    def rating_user(self):
         request = self.context.get('request')
-        if request is None or not hasattr(request, "user"):
+        if request is None or not getattr(getattr(request, "user", None), "is_authenticated", False):
             raise serializers.ValidationError("Please login before rating.")
-        
-        data['user'] = request.user
-        return super().create(data)
\ No newline at end of file
+        return request.user
+
+    # set user to rating from request
+    def create(self, data):
+        # only the id is needed, so a stateless JWT user (see ratings.authentication) works too
+        data.pop('user', None)
+        data['user_id'] = self.rating_user().pk
+        return super().create(data)
+
+    # queue the validated rating for write-behind instead of saving it; returns its receipt
+    def enqueue(self):
+        data = self.validated_data
+        return RATING_BUFFER.enqueue(
+            user_id=self.rating_user().pk,
+            professor_id=data['professor'].pk,
+            module_id=data['module'].pk,
+            rating=data['rating'],
+            comment=data.get('comment'),
+        )
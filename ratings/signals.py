@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_token, invalidate_user
+from .models import Professor, Module, Rating, record_ratings
+from .teaching import invalidate_teaching_pairs
+from .versions import bump_catalogue_version
+
+# deletes (including queryset and cascade deletes) run inside the collector's transaction,
+# so decrementing here keeps the aggregates and rollups consistent with the rating table
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_aggregates(sender, instance, **kwargs):
+    record_ratings([instance], sign=-1)
+
+# teaching assignments change when the m2m is edited or either side is deleted (which cascades
+# through the join table without per-row signals). drop the cache now for this process and again
+# on commit, so no other worker can re-cache the pre-commit state under the new version
+def teaching_pairs_changed(**kwargs):
+    invalidate_teaching_pairs()
+    transaction.on_commit(invalidate_teaching_pairs)
+
+@receiver(m2m_changed, sender=Module.professor.through)
+def module_professors_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        teaching_pairs_changed()
+
+post_save.connect(teaching_pairs_changed, sender=Module.professor.through, dispatch_uid='teaching_pair_saved')
+post_delete.connect(teaching_pairs_changed, sender=Module.professor.through, dispatch_uid='teaching_pair_deleted')
+post_delete.connect(teaching_pairs_changed, sender=Module, dispatch_uid='teaching_module_deleted')
+post_delete.connect(teaching_pairs_changed, sender=Professor, dispatch_uid='teaching_professor_deleted')
+
+# any edit to professors, modules or their assignments changes what /list/ returns
+def catalogue_changed(**kwargs):
+    bump_catalogue_version()
+    transaction.on_commit(bump_catalogue_version)
+
+@receiver(m2m_changed, sender=Module.professor.through)
+def module_catalogue_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        catalogue_changed()
+
+for model in (Professor, Module, Module.professor.through):
+    post_save.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_saved_{model.__name__}')
+    post_delete.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_deleted_{model.__name__}')
+
+# cached authentication: a saved user may have been deactivated or changed password, and a
+# deleted token must stop working at once; drop again on commit, as for the teaching pairs
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
+
+post_save.connect(user_changed, sender=get_user_model(), dispatch_uid='auth_user_saved')
+post_delete.connect(user_changed, sender=get_user_model(), dispatch_uid='auth_user_deleted')
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+    transaction.on_commit(lambda: invalidate_token(instance.key))
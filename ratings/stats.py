@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Sum
+from .models import Professor, STAR_FIELDS
+from .versions import catalogue_version, stats_version
+
+DEFAULT_LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = 100
+# how many "average" ratings a professor is assumed to start with when weighting
+DEFAULT_PRIOR_WEIGHT = 5
+
+# totals for every professor in one grouped query over the pre-aggregated pairs,
+# cached until a rating is written or the catalogue changes
+def professor_totals():
+    cache_key = f'ratings:professor-totals:{catalogue_version()}:{stats_version()}'
+    totals = cache.get(cache_key)
+    if totals is None:
+        totals = [*Professor.objects.using(DEFAULT_DB_ALIAS).order_by('id').values('id', 'name').annotate(
+            rating_sum=Sum('ratingaggregate__rating_sum', default=0),
+            rating_count=Sum('ratingaggregate__rating_count', default=0),
+            **{field: Sum(f'ratingaggregate__{field}', default=0) for field in STAR_FIELDS}
+        )]
+        cache.set(cache_key, totals)
+    return totals
+
+def professor_summary(row):
+    count = row['rating_count']
+    return {
+        "professor": {"id": row['id'], "name": row['name']},
+        "rating_count": count,
+        "average_rating": round(row['rating_sum'] / count, 2) if count else None,
+        "distribution": {str(star): row[field] for star, field in enumerate(STAR_FIELDS, start=1)},
+    }
+
+# rank professors by mean rating, or by a Bayesian average that pulls professors with
+# few ratings towards the overall mean: (prior * overall_mean + sum) / (prior + count)
+def leaderboard(totals, limit=DEFAULT_LEADERBOARD_SIZE, weighted=False, prior=DEFAULT_PRIOR_WEIGHT, min_ratings=1):
+    rated = [row for row in totals if row['rating_count'] >= max(min_ratings, 1)]
+    overall_count = sum(row['rating_count'] for row in totals)
+    overall_mean = sum(row['rating_sum'] for row in totals) / overall_count if overall_count else 0
+
+    def score(row):
+        if weighted:
+            return (prior * overall_mean + row['rating_sum']) / (prior + row['rating_count'])
+        return row['rating_sum'] / row['rating_count']
+
+    ranked = sorted(rated, key=lambda row: (-score(row), -row['rating_count'], row['id']))[:limit]
+    return [
+        {"rank": rank, "score": round(score(row), 2), **professor_summary(row)}
+        for rank, row in enumerate(ranked, start=1)
+    ]
@@ -0,0 +1,84 @@
+import threading
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from .versions import aget_version, bump_version, get_version
+
+# the set of (professor_id, module_id) teaching assignments, cached at two levels:
+# a per-process copy, and a shared copy in Django's cache keyed by a version token.
+# any change to Module.professor swaps the token, so every worker reloads on its next check.
+# loads always read the primary, never a replica that may still lag behind the change
+PAIRS_KEY = 'ratings:teaching-pairs'
+VERSION_KEY = 'ratings:teaching-pairs:version'
+
+_lock = threading.Lock()
+# (version, pairs), always replaced whole so a reader never pairs one version with another's pairs
+_local = (None, frozenset())
+
+def _load_pairs():
+    Module = apps.get_model('ratings', 'Module')
+    return frozenset(Module.professor.through.objects.using(DEFAULT_DB_ALIAS).values_list('professor_id', 'module_id'))
+
+# all teaching pairs, reloaded only when the shared version token has moved
+def teaching_pairs():
+    global _local
+    version = get_version(VERSION_KEY)
+    local_version, local_pairs = _local
+    if local_version == version:
+        return local_pairs
+
+    with _lock:
+        local_version, local_pairs = _local
+        if local_version == version:
+            return local_pairs
+        cached = cache.get(PAIRS_KEY)
+        if cached is not None and cached[0] == version:
+            pairs = cached[1]
+        else:
+            pairs = _load_pairs()
+            cache.set(PAIRS_KEY, (version, pairs), timeout=None)
+        _local = (version, pairs)
+        return pairs
+
+# async twin of teaching_pairs() for the ASGI views, which may not touch the sync ORM
+async def ateaching_pairs():
+    global _local
+    version = await aget_version(VERSION_KEY)
+    local_version, local_pairs = _local
+    if local_version == version:
+        return local_pairs
+
+    cached = await cache.aget(PAIRS_KEY)
+    if cached is not None and cached[0] == version:
+        pairs = cached[1]
+    else:
+        Module = apps.get_model('ratings', 'Module')
+        pairs = frozenset([pair async for pair in Module.professor.through.objects.using(DEFAULT_DB_ALIAS).values_list('professor_id', 'module_id')])
+        await cache.aset(PAIRS_KEY, (version, pairs), timeout=None)
+    with _lock:
+        _local = (version, pairs)
+    return pairs
+
+# does this professor teach this module? ids may arrive as strings from query params
+def teaches(professor_id, module_id):
+    try:
+        return (int(professor_id), int(module_id)) in teaching_pairs()
+    except (TypeError, ValueError):
+        return False
+
+async def ateaches(professor_id, module_id):
+    try:
+        return (int(professor_id), int(module_id)) in await ateaching_pairs()
+    except (TypeError, ValueError):
+        return False
+
+# the subset of the given (professor_id, module_id) pairs that are real teaching assignments
+def taught_pairs(pairs):
+    return set(pairs) & teaching_pairs()
+
+def invalidate_teaching_pairs():
+    global _local
+    with _lock:
+        bump_version(VERSION_KEY)
+        cache.delete(PAIRS_KEY)
+        _local = (None, frozenset())
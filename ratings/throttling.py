@@ -0,0 +1,174 @@
+"""
+Token-bucket throttling for the write and auth endpoints, and load shedding for everything.
+
+Views opt in with a `throttle_scope`; each scope's budget is a DRF-style rate in
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] ("60/min" = a bucket of 60 requests, refilled at one
+per second), kept per user when authenticated and per client IP otherwise. Buckets live in
+the THROTTLE_CACHE cache, which must be a shared backend for the budgets to hold across
+workers. Over budget, DRF answers 429 with Retry-After.
+
+LoadSheddingMiddleware answers 503 with Retry-After while this worker already has too many
+requests in flight, or too many writes queued for SQLite's single writer lock.
+"""
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from .metrics import REGISTRY, Counter
+
+BUCKET_KEY = 'ratings:throttle:{scope}:{ident}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+SHED_TOTAL = REGISTRY.register(Counter(
+    'profrates_requests_rejected_total', "Requests turned away by throttling or load shedding.", ('reason',)
+))
+
+def throttle_cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+def throttling_enabled():
+    return getattr(settings, 'THROTTLING_ENABLED', True)
+
+# (capacity, tokens refilled per second) for a scope, or None if it is not throttled
+def scope_budget(scope):
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+    if not rate:
+        return None
+    num, period = rate.split('/')
+    return int(num), int(num) / {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+# take one token from a bucket stored as (tokens, last update); returns 0 if the request may
+# proceed, else the seconds until a token is available. a get and a set, not atomic: two
+# workers racing on the same bucket can both spend its last token, which only loosens the
+# budget slightly
+def take_token(state, capacity, refill, now):
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    with REGISTRY.lock:
+        SHED_TOTAL.inc(('throttled',))
+    return (tokens, now), (1 - tokens) / refill
+
+def consume(scope, ident):
+    budget = scope_budget(scope)
+    if budget is None or not throttling_enabled():
+        return 0
+    capacity, refill = budget
+    key = BUCKET_KEY.format(scope=scope, ident=ident)
+    cache = throttle_cache()
+    state, wait = take_token(cache.get(key), capacity, refill, time.time())
+    # an untouched bucket refills completely by the time its entry expires
+    cache.set(key, state, timeout=int(capacity / refill) + 1)
+    return wait
+
+async def aconsume(scope, ident):
+    budget = scope_budget(scope)
+    if budget is None or not throttling_enabled():
+        return 0
+    capacity, refill = budget
+    key = BUCKET_KEY.format(scope=scope, ident=ident)
+    cache = throttle_cache()
+    state, wait = take_token(await cache.aget(key), capacity, refill, time.time())
+    await cache.aset(key, state, timeout=int(capacity / refill) + 1)
+    return wait
+
+def ip_ident(request):
+    return f'ip:{BaseThrottle().get_ident(request)}'
+
+# DRF requests only: their user is already authenticated by the time throttles run
+def client_ident(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return ip_ident(request)
+
+class TokenBucketThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        self.delay = consume(scope, client_ident(request)) if scope else 0
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+def retry_response(status, message, wait):
+    response = JsonResponse({"error": message}, status=status)
+    response['Retry-After'] = str(max(1, round(wait)))
+    return response
+
+# per-worker counts of requests being handled, and of writes among them
+class InFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.writes = 0
+
+    def enter(self, writing, max_requests, max_writes):
+        with self.lock:
+            if self.requests >= max_requests:
+                return 'in_flight'
+            if writing and self.writes >= max_writes:
+                return 'write_queue'
+            self.requests += 1
+            self.writes += writing
+        return None
+
+    def leave(self, writing):
+        with self.lock:
+            self.requests -= 1
+            self.writes -= writing
+
+IN_FLIGHT = InFlight()
+
+# sheds load before any work is done for the request; works under WSGI and ASGI
+class LoadSheddingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        writing = request.method not in SAFE_METHODS
+        rejected = self.enter(request, writing)
+        if rejected is not None:
+            return rejected
+        try:
+            return self.get_response(request)
+        finally:
+            IN_FLIGHT.leave(writing)
+
+    async def __acall__(self, request):
+        writing = request.method not in SAFE_METHODS
+        rejected = self.enter(request, writing)
+        if rejected is not None:
+            return rejected
+        try:
+            return await self.get_response(request)
+        finally:
+            IN_FLIGHT.leave(writing)
+
+    def enter(self, request, writing):
+        limits = getattr(settings, 'LOAD_SHEDDING', {})
+        if request.path in limits.get('EXEMPT_PATHS', ()):
+            IN_FLIGHT.enter(writing, float('inf'), float('inf'))
+            return None
+        reason = IN_FLIGHT.enter(
+            writing,
+            limits.get('MAX_IN_FLIGHT_REQUESTS', float('inf')),
+            limits.get('MAX_PENDING_WRITES', float('inf')),
+        )
+        if reason is None:
+            return None
+        with REGISTRY.lock:
+            SHED_TOTAL.inc((reason,))
+        return retry_response(503, "The server is busy. Please try again.", limits.get('RETRY_AFTER', 1))
@@ -3,18 +3,31 @@ URL configuration for ratings.
 
 """
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import RegisterView, LoginView, AuthToken, LogoutView, ListView, ViewView, AverageView, RateView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .async_views import AsyncListView, AsyncViewView, AsyncAverageView, AsyncRegisterView, AsyncLoginView
+from .views import RegisterView, LoginView, AuthToken, TokenView, LogoutView, ListView, ViewView, SearchView, AverageView, RateView, RateReceiptView, BulkRateView, ExportView, ProfessorSummaryView, LeaderboardView, TrendsView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('token-auth/', AuthToken.as_view(), name='token-auth'),
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'), 
+    path('token/', TokenView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('list/', ListView.as_view(), name='list'),
     path('view/', ViewView.as_view(), name='view'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('search/', SearchView.as_view(), name='search'),
     path('average/', AverageView.as_view(), name='average'),
-    path('rate/', RateView.as_view(), name='rate')
+    path('professors/summary/', ProfessorSummaryView.as_view(), name='professor-summary'),
+    path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('trends/', TrendsView.as_view(), name='trends'),
+    path('async/list/', AsyncListView.as_view(), name='async-list'),
+    path('async/view/', AsyncViewView.as_view(), name='async-view'),
+    path('async/average/', AsyncAverageView.as_view(), name='async-average'),
+    path('async/register/', AsyncRegisterView.as_view(), name='async-register'),
+    path('async/login/', AsyncLoginView.as_view(), name='async-login'),
+    path('rate/', RateView.as_view(), name='rate'),
+    path('rate/receipts/<str:receipt>/', RateReceiptView.as_view(), name='rate-receipt'),
+    path('rate/bulk/', BulkRateView.as_view(), name='rate-bulk')
 ]
\ No newline at end of file
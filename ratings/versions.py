@@ -0,0 +1,45 @@
+import uuid
+from django.core.cache import cache
+
+# version tokens live in the shared cache; anything cached "at version X" is stale
+# as soon as the token moves, so invalidation is a single cache write
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+        version = await cache.aget(key)
+    return version
+
+def bump_version(key):
+    version = uuid.uuid4().hex
+    cache.set(key, version, timeout=None)
+    return version
+
+# professors, modules and who teaches what - everything /list/ returns
+CATALOGUE_VERSION_KEY = 'ratings:catalogue:version'
+
+def catalogue_version():
+    return get_version(CATALOGUE_VERSION_KEY)
+
+async def acatalogue_version():
+    return await aget_version(CATALOGUE_VERSION_KEY)
+
+def bump_catalogue_version(**kwargs):
+    bump_version(CATALOGUE_VERSION_KEY)
+
+# anything derived from ratings (summaries, leaderboards); moved by every rating write
+STATS_VERSION_KEY = 'ratings:stats:version'
+
+def stats_version():
+    return get_version(STATS_VERSION_KEY)
+
+def bump_stats_version(**kwargs):
+    bump_version(STATS_VERSION_KEY)
@@ -1,45 +1,66 @@
 from django.shortcuts import render
-from django.contrib.auth.models import User
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics, permissions
-from .models import Professor, Module, Rating
+from .models import Professor, Module, Rating, RatingAggregate, RatingRollup, bucket_start, record_ratings
+from django.db.models import Sum
+from django.utils import timezone
+from .teaching import teaches, taught_pairs
+from .versions import catalogue_version
+from django.core.cache import cache
+from django.utils.http import parse_etags
 from .serializers import ProfessorSerializer, RatingSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import authenticate
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
-from django.db.models import Avg
 from django.core.exceptions import ValidationError
+from .filters import filter_ratings, parse_int, parse_moment
+from .stats import DEFAULT_LEADERBOARD_SIZE, DEFAULT_PRIOR_WEIGHT, MAX_LEADERBOARD_SIZE, leaderboard, professor_summary, professor_totals
+from .export import EXPORT_FORMATS, export_lines, export_rows
+from .pagination import KeysetPaginator
+from .search import SearchPaginator, parse_search_query, search_row
+from .parsers import NDJSONParser
+from .renderers import FAST_RENDERERS, OPTIONAL_RENDERERS
+from .fastpath import fast_view_page_data, fast_view_queryset, professor_list_data
+from rest_framework.parsers import JSONParser
+from django.db import DEFAULT_DB_ALIAS, transaction
+from .locking import LockTimeout, retry_on_lock
+from .accounts import AccountExists, create_account
+from .writebehind import BufferFull, receipt_status, write_behind_enabled
+from django.urls import reverse
+from django.contrib.auth.hashers import make_password
 
 # user registration API - register
 class RegisterView(APIView):
+    throttle_scope = 'register'
+
     def post(self, request):
         username = request.data.get('username')
         email = request.data.get('email')
         password = request.data.get('password')
 
-        # error handling - check if username already exists
-        if User.objects.filter(username=username).exists():
-            return Response({"Username already in use. Please choose a different username."}, status=status.HTTP_400_BAD_REQUEST)
-
-         # error handling - check if email is in use
-        if User.objects.filter(email=email).exists():
-            return Response({"Email already in use."}, status=status.HTTP_400_BAD_REQUEST)
-
         # error handling - check if all fields are provided
         if not username or not email or not password:
             return Response({"All fields are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # successful registration
-        user = User.objects.create_user(username=username, email=email, password=password)
-        user.save()
+        # successful registration: a single insert, which the unique indexes on username and
+        # email reject for duplicates; retried while other writers hold the database
+        try:
+            create_account(username, email, make_password(password))
+        except AccountExists as e:
+            return Response({str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except LockTimeout:
+            return Response({"error": "The server is busy. Please try again."}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
         return Response({"Successfully registered! Please log in."}, status=status.HTTP_201_CREATED)
 
 # auth token endpoint, for token related views
 class AuthToken(ObtainAuthToken):
+    throttle_scope = 'auth'
+
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
@@ -49,6 +70,8 @@ class AuthToken(ObtainAuthToken):
     
 # user login API - login
 class LoginView(APIView):
+    throttle_scope = 'auth'
+
     def post(self, request, *args, **kwargs):
         username = request.data.get('username')
         password = request.data.get('password')
@@ -64,6 +87,10 @@ class LoginView(APIView):
         else:
             return Response({'error': 'Credentials are invalid. Please try logging in again.'}, status=status.HTTP_401_UNAUTHORIZED)
 
+# JWT pair endpoint - token; simplejwt's view, in the auth throttle scope
+class TokenView(TokenObtainPairView):
+    throttle_scope = 'auth'
+
 # user logout API - logout        
 class LogoutView(APIView):
     def post(self, request):
@@ -71,34 +98,110 @@ class LogoutView(APIView):
         response.delete_cookie('access_token')
         return response
 
+LIST_CACHE_KEY = 'ratings:list:{version}'
+
+# does the client's If-None-Match already name this representation?
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # weak comparison: compressed responses carry the same tag weakened to W/"..."
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+
 # list professors + modules API - list
+# responses are cached per catalogue version, which also serves as a strong ETag
 class ListView(generics.ListAPIView):
     queryset = Professor.objects.prefetch_related('module_set').all()
     serializer_class = ProfessorSerializer
+    renderer_classes = FAST_RENDERERS
+
+    def get(self, request, *args, **kwargs):
+        version = catalogue_version()
+        # the tag covers the representation too, so JSON and browsable responses differ
+        etag = f'"{version}-{request.accepted_renderer.format}"'
 
-# view all ratings API - view
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        cache_key = LIST_CACHE_KEY.format(version=version)
+        data = cache.get(cache_key)
+        if data is None:
+            # filled from the primary, so a lagging replica cannot cache stale data under this version;
+            # built from values_list() rows, with exactly the data of ProfessorSerializer
+            data = professor_list_data(using=DEFAULT_DB_ALIAS)
+            cache.set(cache_key, data)
+
+        return Response(data, headers={'ETag': etag})
+
+# the fields a /view/ row can carry, in the order they are sent
+ROW_FIELDS = ('professor', 'module', 'rating', 'comment', 'date')
+VIEW_SHAPES = ('nested', 'normalized')
+
+# ?fields= (comma separated, default all) and ?shape= for a ratings listing
+def parse_view_options(params):
+    shape = params.get('shape') or 'nested'
+    if shape not in VIEW_SHAPES:
+        raise ValidationError(f"shape must be one of: {', '.join(VIEW_SHAPES)}.")
+
+    fields = params.get('fields')
+    if not fields:
+        return ROW_FIELDS, shape == 'normalized'
+    requested = {field.strip() for field in fields.split(',') if field.strip()}
+    unknown = sorted(requested - set(ROW_FIELDS))
+    if unknown:
+        raise ValidationError(f"Unknown field: {unknown[0]}. fields must be taken from: {', '.join(ROW_FIELDS)}.")
+    return tuple(field for field in ROW_FIELDS if field in requested), shape == 'normalized'
+
+# view ratings API - view
+# filterable by professor, module, since/until and min_rating, paginated by (date, id) cursor;
+# ?fields= picks the row fields, ?shape=normalized side-loads professors and modules, and the
+# page can be had as MessagePack (Accept: application/msgpack) when msgpack is installed
 class ViewView(APIView):
-    def get(self, request):  
-        ratings = Rating.objects.select_related('professor').all()  
-        data = [] 
-        for rating in ratings:  
-            data.append({  
-                "professor": {
-                    "id": rating.professor.id,
-                    "name": rating.professor.name
-                },
-                "module": {
-                    "id": rating.module.id,
-                    "name": rating.module.name,
-                    "year": rating.module.year,
-                    "semester": rating.module.semester
-                },
-                "rating": rating.rating,  
-                "comment": rating.comment,  
-                "date": rating.date.isoformat()  
-            })  
-
-        return Response(data)  
+    renderer_classes = [*FAST_RENDERERS, *OPTIONAL_RENDERERS]
+
+    def get(self, request):
+        try:
+            fields, normalized = parse_view_options(request.query_params)
+            ratings = filter_ratings(fast_view_queryset(fields), request.query_params)
+            paginator = KeysetPaginator(request)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=400)
+
+        data = fast_view_page_data(paginator, paginator.paginate(ratings), fields, normalized)
+        return Response(data, headers={'Vary': 'Accept'})
+
+# export ratings API - export
+# streams NDJSON (default) or CSV with ?type=csv, taking the same filters as /view/
+class ExportView(APIView):
+    def get(self, request):
+        export_format = request.query_params.get('type', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"type must be one of: {', '.join(EXPORT_FORMATS)}."}, status=400)
+
+        try:
+            ratings = filter_ratings(Rating.objects.all(), request.query_params)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=400)
+
+        content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(export_lines(export_rows(ratings), export_format), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="ratings.{export_format}"'
+        return response
+
+# search rating comments API - search
+# ranked full-text matches for ?q=, taking the same filters as /view/, paginated by (rank, id) cursor
+class SearchView(APIView):
+    def get(self, request):
+        try:
+            query = parse_search_query(request.query_params)
+            paginator = SearchPaginator(request)
+            rows = paginator.paginate(query, request.query_params)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=400)
+
+        return Response(paginator.get_paginated_response_data([search_row(row) for row in rows]))
 
 # average professor rating API - average
 class AverageView(APIView):
@@ -111,30 +214,35 @@ class AverageView(APIView):
         if not professor_id or not module_id:  
             return Response({"error": "Please provide both professor and module ID."}, status=400)  
 
+        # fast path: cached pair check, then one indexed read of the pre-computed totals
+        aggregate = None
+        if teaches(professor_id, module_id):
+            aggregate = RatingAggregate.objects.filter(
+                professor_id=professor_id,
+                module_id=module_id,
+                rating_count__gt=0
+            ).values_list('rating_sum', 'rating_count').first()
+
+        if aggregate is not None:
+            rating_sum, rating_count = aggregate
+            return Response({
+                "professor": professor_id,
+                "module": module_id,
+                "average_rating": round(rating_sum / rating_count)
+            })
+
+        # slow path: work out which error applies
         try:
             # error handling: check if the module exists
             module = Module.objects.get(id=module_id)
 
             # error handling: check if the professor exists in the module's ManyToManyField
             professor = Professor.objects.get(id=professor_id)
-            if not module.professor.filter(id=professor_id).exists():
+            if not teaches(professor_id, module_id):
                 return Response({"error": "Professor does not teach that module."}, status=400)
 
-            # Query ratings for the given professor and module
-            average = Rating.objects.filter(
-                professor=professor,
-                module=module
-            ).aggregate(avg_rating=Avg('rating'))
-
-            # error handling if no average rating is found
-            if average['avg_rating'] is None:
-                return Response({"error": "No ratings found for that professor in that module."}, status=404)
-
-            return Response({
-                "professor": professor_id,
-                "module": module_id,
-                "average_rating": round(average['avg_rating'])
-            })
+            # error handling if no ratings exist yet
+            return Response({"error": "No ratings found for that professor in that module."}, status=404)
 
         except Module.DoesNotExist:
             return Response({"error": "Module not found."}, status=404)
@@ -142,19 +250,131 @@ class AverageView(APIView):
         except Professor.DoesNotExist:
             return Response({"error": "Professor not found."}, status=404)
     
+# professor summary API - professors/summary
+# overall average, count and star distribution for every professor, or one with ?professor=
+class ProfessorSummaryView(APIView):
+    def get(self, request):
+        try:
+            professor_id = parse_int(request.query_params, 'professor')
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=400)
+
+        summaries = [professor_summary(row) for row in professor_totals()]
+        if professor_id is None:
+            return Response(summaries)
+
+        for summary in summaries:
+            if summary["professor"]["id"] == professor_id:
+                return Response(summary)
+        return Response({"error": "Professor not found."}, status=404)
+
+# professor leaderboard API - leaderboard
+# top ?limit= professors by average, or by Bayesian average with ?weighted=true&prior=N
+class LeaderboardView(APIView):
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = parse_int(params, 'limit', minimum=1, maximum=MAX_LEADERBOARD_SIZE) or DEFAULT_LEADERBOARD_SIZE
+            prior = parse_int(params, 'prior', minimum=0)
+            min_ratings = parse_int(params, 'min_ratings', minimum=1) or 1
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=400)
+
+        weighted = params.get('weighted', '').lower() in ('1', 'true', 'yes')
+        return Response(leaderboard(
+            professor_totals(),
+            limit=limit,
+            weighted=weighted,
+            prior=DEFAULT_PRIOR_WEIGHT if prior is None else prior,
+            min_ratings=min_ratings
+        ))
+
+# rating trends API - trends
+# per-day or per-week counts and averages, read only from the rollup table;
+# optional professor/module filters and a since/until date range
+class TrendsView(APIView):
+    def get(self, request):
+        params = request.query_params
+        period = params.get('period', RatingRollup.WEEK)
+        if period not in RatingRollup.PERIODS:
+            return Response({"error": f"period must be one of: {', '.join(RatingRollup.PERIODS)}."}, status=400)
+
+        try:
+            professor_id = parse_int(params, 'professor')
+            module_id = parse_int(params, 'module')
+            since = parse_moment(params, 'since')
+            until = parse_moment(params, 'until', end_of_day=True)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=400)
+
+        rollups = RatingRollup.objects.filter(period=period)
+        if professor_id is not None:
+            rollups = rollups.filter(professor_id=professor_id)
+        if module_id is not None:
+            rollups = rollups.filter(module_id=module_id)
+        if since is not None:
+            rollups = rollups.filter(bucket__gte=bucket_start(timezone.localdate(since), period))
+        if until is not None:
+            rollups = rollups.filter(bucket__lte=timezone.localdate(until))
+
+        buckets = rollups.values('bucket').annotate(
+            rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count')
+        ).filter(rating_count__gt=0).order_by('bucket')
+
+        return Response({
+            "period": period,
+            "professor": professor_id,
+            "module": module_id,
+            "buckets": [
+                {
+                    "bucket": row['bucket'].isoformat(),
+                    "rating_count": row['rating_count'],
+                    "average_rating": round(row['rating_sum'] / row['rating_count'], 2)
+                }
+                for row in buckets
+            ]
+        })
+
 # rate a professor API - rate
 class RateView(APIView):
+    throttle_scope = 'rate'
+
     def post(self, request):
         # variables
         professor_id = request.data.get("professor")
         module_id = request.data.get("module")
-        rating = request.data.get("rating")
         comment = request.data.get("comment", "")
-        serializer = RatingSerializer(data=request.data, context={'request': request})
+        # dry_run (query string or body) runs every check but writes nothing; rating may be left out
+        dry_run = str(request.query_params.get("dry_run", request.data.get("dry_run", ""))).lower() in ("1", "true", "yes")
+        serializer = RatingSerializer(data=request.data, context={'request': request}, partial=dry_run)
+
+        # error handling: dry runs still need both IDs to check the pair
+        if dry_run and (not professor_id or not module_id):
+            return Response({"error": "Please provide both professor and module ID."}, status=400)
 
         # saving user request to data
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            # error handling: ensure professor teaches module before anything is written
+            if not teaches(professor_id, module_id):
+                return Response({"error": "This professor does not teach this module."}, status=400)
+
+            if dry_run:
+                return Response({"valid": True}, status=status.HTTP_200_OK)
+
+            # write-behind: queued for the next batch, answered with a receipt to check on
+            if write_behind_enabled():
+                try:
+                    receipt = serializer.enqueue()
+                except BufferFull:
+                    return Response({"error": "The server is busy. Please try again."}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+                url = request.build_absolute_uri(reverse('rate-receipt', args=[receipt]))
+                return Response({"receipt": receipt, "status": "pending", "status_url": url}, status=status.HTTP_202_ACCEPTED, headers={"Location": url})
+
+            # the rating and its aggregates are written in one transaction, retried on lock contention
+            try:
+                retry_on_lock(lambda: serializer.save())
+            except LockTimeout:
+                return Response({"error": "The server is busy. Please try again."}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
         # error handling: ensure professor teaches module
@@ -162,14 +382,100 @@ class RateView(APIView):
             professor = Professor.objects.get(id=professor_id)
             module = Module.objects.get(id=module_id)
 
-            if not module.professor.filter(id=professor_id).exists():
+            if not teaches(professor_id, module_id):
                 return Response({"error": "This professor does not teach this module."}, status=400)
 
         except (Professor.DoesNotExist, Module.DoesNotExist):
             return Response({"error": "Invalid professor or module ID."}, status=400)
 
-        # error handling: ensure rating is between 1-5
-        if not (1 <= rating <= 5):
-            return Response({"error": "Rating must be between 1 and 5."}, status=400)
-  
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        # anything else (a rating outside 1-5 included) was caught by the serializer
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# rating receipt API - rate receipt
+# where a rating accepted by write-behind /rate/ has got to: pending, created (with its id) or failed
+class RateReceiptView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, receipt):
+        state = receipt_status(receipt, request.user.pk)
+        if state is None:
+            return Response({"error": "Receipt not found."}, status=404)
+        return Response({"receipt": receipt, **state})
+
+MAX_BULK_RATINGS = 50000
+BULK_CHUNK_SIZE = 1000
+
+# validate the shape of one bulk item, returning (professor_id, module_id, rating, comment)
+def parse_bulk_rating(item):
+    if not isinstance(item, dict):
+        raise ValidationError("Each rating must be a JSON object.")
+    try:
+        professor_id = int(item["professor"])
+        module_id = int(item["module"])
+    except KeyError as e:
+        raise ValidationError(f"{e.args[0]} is required.")
+    except (TypeError, ValueError):
+        raise ValidationError("professor and module must be integer IDs.")
+
+    rating = item.get("rating")
+    if isinstance(rating, bool) or not isinstance(rating, int) or not (1 <= rating <= 5):
+        raise ValidationError("Rating must be between 1 and 5.")
+
+    comment = item.get("comment", "")
+    if comment is not None and not isinstance(comment, str):
+        raise ValidationError("comment must be a string.")
+    return professor_id, module_id, rating, comment
+
+# bulk rate API - rate/bulk
+# accepts a JSON array or NDJSON, checks every professor/module pair in one query and inserts in chunks
+class BulkRateView(APIView):
+    throttle_scope = 'rate-bulk'
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"error": "Expected a JSON array or NDJSON body."}, status=400)
+        if len(items) > MAX_BULK_RATINGS:
+            return Response({"error": f"At most {MAX_BULK_RATINGS} ratings per request."}, status=400)
+
+        results = [None] * len(items)
+        parsed = {}
+        for index, item in enumerate(items):
+            try:
+                parsed[index] = parse_bulk_rating(item)
+            except ValidationError as e:
+                results[index] = {"index": index, "status": "error", "error": e.messages[0]}
+
+        # error handling: ensure professor teaches module, for every pair at once
+        valid_pairs = taught_pairs((p[0], p[1]) for p in parsed.values())
+        pending = []
+        for index, (professor_id, module_id, rating, comment) in parsed.items():
+            if (professor_id, module_id) not in valid_pairs:
+                results[index] = {"index": index, "status": "error", "error": "This professor does not teach this module."}
+                continue
+            pending.append((index, Rating(
+                user_id=request.user.pk,
+                professor_id=professor_id,
+                module_id=module_id,
+                rating=rating,
+                comment=comment
+            )))
+
+        with transaction.atomic():
+            for start in range(0, len(pending), BULK_CHUNK_SIZE):
+                chunk = pending[start:start + BULK_CHUNK_SIZE]
+                Rating.objects.bulk_create([rating for _, rating in chunk])
+            # once per request, so each aggregate and rollup row is written once however many chunks touch it
+            record_ratings(rating for _, rating in pending)
+
+        for index, rating in pending:
+            results[index] = {"index": index, "status": "created", "id": rating.id}
+
+        created = len(pending)
+        return Response({
+            "created": created,
+            "failed": len(items) - created,
+            "results": results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,215 @@
+"""
+Write-behind for /rate/: group commits for end-of-term bursts.
+
+With WRITE_BEHIND_ENABLED, RateView validates a rating as usual, queues it in this worker's
+RatingBuffer and answers 202 with a receipt instead of writing it. A background thread writes
+queued ratings in batches, one transaction (and one fsync) per batch, as soon as MAX_BATCH are
+waiting or the oldest has waited MAX_DELAY seconds. Receipts live in the default cache, so any
+worker can report on them given a shared backend; they go from "pending" to "created" once the
+batch has committed, or to "failed".
+
+Batches are committed with synchronous=FULL whatever the SQLite profile, so a "created" receipt
+survives a power cut. A queued rating is only in memory until then: the buffer is drained when
+the process exits (on SIGTERM too), but a crash loses what is queued, which is why clients that
+need to know should check their receipt.
+"""
+import atexit
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, connections, transaction
+from .locking import LockTimeout, retry_on_lock
+from .metrics import REGISTRY, Counter, Histogram
+from .models import Rating, record_ratings
+
+RECEIPT_KEY = 'ratings:receipt:{receipt}'
+DEFAULT_LIMITS = {
+    'MAX_BATCH': 200,
+    'MAX_DELAY': 0.05,
+    'MAX_QUEUE': 5000,
+    'DRAIN_TIMEOUT': 30,
+    'RECEIPT_TIMEOUT': 3600,
+}
+
+WRITTEN_TOTAL = REGISTRY.register(Counter(
+    'profrates_write_behind_ratings_total', "Queued ratings written or given up on, by outcome.", ('outcome',)
+))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    'profrates_write_behind_batch_size', "Ratings written per write-behind transaction.", (), (1, 5, 10, 50, 100, 200, 500)
+))
+
+class BufferFull(Exception):
+    pass
+
+def write_behind_enabled():
+    return getattr(settings, 'WRITE_BEHIND_ENABLED', False)
+
+def write_behind_limit(name):
+    return getattr(settings, 'WRITE_BEHIND', {}).get(name, DEFAULT_LIMITS[name])
+
+def save_receipts(receipts):
+    cache.set_many(
+        {RECEIPT_KEY.format(receipt=receipt): state for receipt, state in receipts.items()},
+        timeout=write_behind_limit('RECEIPT_TIMEOUT'),
+    )
+
+# a receipt's state, or None if it is unknown, expired or belongs to someone else
+def receipt_status(receipt, user_id):
+    state = cache.get(RECEIPT_KEY.format(receipt=receipt))
+    if state is None or state['user'] != user_id:
+        return None
+    return {key: value for key, value in state.items() if key != 'user'}
+
+# the ratings queued by one worker process, and the thread writing them out
+class RatingBuffer:
+    def __init__(self):
+        self.lock = threading.Condition()
+        # (receipt, monotonic time queued, Rating field values)
+        self.queue = deque()
+        self.worker = None
+        self.closing = False
+
+    def enqueue(self, user_id, professor_id, module_id, rating, comment):
+        receipt = uuid.uuid4().hex
+        fields = {
+            'user_id': user_id,
+            'professor_id': professor_id,
+            'module_id': module_id,
+            'rating': rating,
+            'comment': comment,
+        }
+        # recorded before the rating is queued, so it can never overwrite the flushed state
+        save_receipts({receipt: {'user': user_id, 'status': 'pending'}})
+        with self.lock:
+            if self.closing or len(self.queue) >= write_behind_limit('MAX_QUEUE'):
+                cache.delete(RECEIPT_KEY.format(receipt=receipt))
+                raise BufferFull("Too many ratings waiting to be written.")
+            self.queue.append((receipt, time.monotonic(), fields))
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name='rating-write-behind', daemon=True)
+                self.worker.start()
+            self.lock.notify()
+        return receipt
+
+    def pending(self):
+        with self.lock:
+            return len(self.queue)
+
+    # stop taking ratings, write out everything queued and wait (up to DRAIN_TIMEOUT) for it
+    def drain(self):
+        with self.lock:
+            self.closing = True
+            self.lock.notify()
+            worker = self.worker
+        if worker is not None:
+            worker.join(write_behind_limit('DRAIN_TIMEOUT'))
+        return self.pending()
+
+    # reopen after drain(), e.g. for a management command that drains mid-run
+    def reopen(self):
+        with self.lock:
+            if self.worker is not None and not self.worker.is_alive():
+                self.worker = None
+            self.closing = False
+
+    def run(self):
+        try:
+            while True:
+                batch = self.next_batch()
+                if batch is None:
+                    return
+                self.flush(batch)
+        finally:
+            connections.close_all()
+            with self.lock:
+                if self.worker is threading.current_thread():
+                    self.worker = None
+
+    # block until a batch is due: MAX_BATCH queued, the oldest queued MAX_DELAY ago, or closing
+    def next_batch(self):
+        with self.lock:
+            while True:
+                if self.queue:
+                    wait = self.queue[0][1] + write_behind_limit('MAX_DELAY') - time.monotonic()
+                    max_batch = write_behind_limit('MAX_BATCH')
+                    if self.closing or wait <= 0 or len(self.queue) >= max_batch:
+                        return [self.queue.popleft() for _ in range(min(max_batch, len(self.queue)))]
+                    self.lock.wait(wait)
+                elif self.closing:
+                    return None
+                else:
+                    self.lock.wait()
+
+    def flush(self, batch):
+        try:
+            ratings = retry_on_lock(lambda: write_ratings([fields for _, _, fields in batch]))
+        except LockTimeout:
+            self.requeue(batch)
+            return
+        except DatabaseError:
+            # one bad rating (say its module was deleted while it waited) must not sink the rest
+            for item in batch:
+                self.flush_one(item)
+            return
+        self.finish(batch, ratings)
+
+    def flush_one(self, item):
+        receipt, _, fields = item
+        try:
+            ratings = retry_on_lock(lambda: write_ratings([fields]))
+        except LockTimeout:
+            self.requeue([item])
+            return
+        except DatabaseError as e:
+            save_receipts({receipt: {'user': fields['user_id'], 'status': 'failed', 'error': str(e)}})
+            with REGISTRY.lock:
+                WRITTEN_TOTAL.inc(('failed',))
+            return
+        self.finish([item], ratings)
+
+    # still locked out after every retry: back to the front of the queue, in order, for the next batch
+    def requeue(self, batch):
+        with self.lock:
+            self.queue.extendleft(reversed(batch))
+        time.sleep(write_behind_limit('MAX_DELAY'))
+
+    def finish(self, batch, ratings):
+        save_receipts({
+            receipt: {'user': fields['user_id'], 'status': 'created', 'id': rating.id}
+            for (receipt, _, fields), rating in zip(batch, ratings)
+        })
+        with REGISTRY.lock:
+            WRITTEN_TOTAL.inc(('created',), len(ratings))
+            BATCH_SIZE.observe((), len(ratings))
+
+# one transaction for the whole batch: the ratings, then their aggregates and rollups
+def write_ratings(rows):
+    if connection.vendor == 'sqlite':
+        # a receipt says "created" only once the rating is on disk, whatever the profile
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = FULL')
+    # fresh instances every attempt, so a rolled-back try leaves no ids behind
+    ratings = [Rating(**fields) for fields in rows]
+    with transaction.atomic():
+        Rating.objects.bulk_create(ratings)
+        record_ratings(ratings)
+    return ratings
+
+RATING_BUFFER = RatingBuffer()
+
+def drain_on_exit():
+    remaining = RATING_BUFFER.drain()
+    if remaining:
+        sys.stderr.write(f"Write-behind: {remaining} queued ratings could not be written before shutdown.\n")
+
+# drain at interpreter exit, and turn a SIGTERM nobody else handles into a normal exit so the
+# drain runs then too; called once the app is ready, and only when write-behind is on
+def install_shutdown_hooks():
+    atexit.register(drain_on_exit)
+    if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))